@@ -1,20 +1,18 @@
+import time
 import numpy as np
-import hashlib
-from typing import Optional, Dict, List
-from qnode import measure_qubit  # expects measure_qubit(bit, prep_basis, meas_basis) -> 0/1
-
-def _privacy_amplify(bitstring: List[int], output_len_bits: int) -> List[int]:
-    if len(bitstring) == 0 or output_len_bits == 0:
-        return []
-    b = bytes(int(''.join(str(bi) for bi in bitstring), 2).to_bytes((len(bitstring)+7)//8, 'big'))
-    digest = hashlib.sha256(b).digest()
-    bits = []
-    for byte in digest:
-        for i in range(8):
-            bits.append((byte >> (7 - i)) & 1)
-            if len(bits) >= output_len_bits:
-                return bits
-    return bits[:output_len_bits]
+from typing import Optional, Dict, Tuple, Union
+from keys import BitKey, BitKeyBuilder
+from privacy import toeplitz_hash
+from reconcile import cascade
+from qnode import MeasurementBackend, get_backend
+from instrument import NULL_TIMER, StageTimer, get_timer
+from channel import ChannelModel
+from eve import EveStrategy, eve_key_stats, get_strategy
+
+def _privacy_amplify(key: BitKey, output_len_bits: int, seed: int = 0) -> BitKey:
+    if len(key) == 0 or output_len_bits == 0:
+        return BitKey.empty()
+    return toeplitz_hash(key, output_len_bits, seed)
 
 def _simple_error_correction_length(sifted_len: int, qber: float, efficiency: float = 1.15) -> int:
     if sifted_len == 0:
@@ -24,6 +22,349 @@ def _simple_error_correction_length(sifted_len: int, qber: float, efficiency: fl
     leaked = int(np.ceil(efficiency * Hq * sifted_len))
     return min(leaked, sifted_len)
 
+_BASIS_LABELS = np.array(['Z', 'X'])
+ABORT_THRESHOLD = 0.15
+# Bump whenever a change alters simulation output for a given seed; cached results are keyed on it
+ENGINE_VERSION = 2
+
+# Event granularities of simulate_bb84_stream and the record type of "block" events
+EVENT_GRANULARITIES = ("qubit", "sampled", "block", "none")
+QUBIT_EVENT_DTYPE = np.dtype([
+    ("index", np.int64),
+    ("alice_bit", np.uint8),
+    ("alice_basis", "U1"),
+    ("bob_basis", "U1"),
+    ("bob_bit", np.uint8),
+    ("eve_intercepted", np.bool_),
+])
+
+# Per-block summary yielded by simulate_bb84_blocks
+BLOCK_SUMMARY_DTYPE = np.dtype([
+    ("block", np.int64),
+    ("pulses", np.int64),
+    ("sifted", np.int64),
+    ("test_bits", np.int64),
+    ("test_errors", np.int64),
+    ("total_pulses", np.int64),
+    ("total_sifted", np.int64),
+    ("running_sift_rate", np.float64),
+    ("running_qber", np.float64),
+])
+
+
+def _post_process(
+    remain_A: Optional[BitKey],
+    remain_B: Optional[BitKey],
+    remain_len: int,
+    observed_error_rate: Optional[float],
+    ec_efficiency: float,
+    privacy_amp_ratio: float,
+    rng: np.random.Generator,
+    reconciliation: str = "cascade",
+    cascade_passes: int = 4,
+    cascade_block_size: Optional[int] = None,
+    timer=NULL_TIMER
+) -> Tuple[BitKey, BitKey, Dict]:
+    # Abort decision, reconciliation and privacy amplification on the non-test bits.
+    # Without key material (remain_A is None) only the leakage estimate is available.
+    # Both sides hash their own key with the same seed; residual errors show up
+    # as a mismatch between Alice's and Bob's final keys.
+    aborted = observed_error_rate is not None and observed_error_rate > ABORT_THRESHOLD
+
+    final_key = final_key_bob = BitKey.empty()
+    final_key_errors = None
+    leaked_bits = 0
+    after_ec_len = 0
+    ec_info = {}
+    # Public seed for the privacy-amplification hash
+    pa_seed = int(rng.integers(0, 2**63))
+
+    if remain_A is None:
+        reconciliation = "estimate"
+
+    if not aborted and remain_len > 0:
+        qber_est = observed_error_rate if observed_error_rate is not None else 0.0
+
+        with timer.stage("error_correction"):
+            if reconciliation == "cascade":
+                remain_B, ec_info = cascade(remain_A, remain_B, qber_est, passes=cascade_passes,
+                                            block_size=cascade_block_size, rng=rng)
+                leaked_bits = ec_info["leaked_bits"]
+            elif reconciliation == "estimate":
+                leaked_bits = _simple_error_correction_length(remain_len, qber_est, efficiency=ec_efficiency)
+            else:
+                raise ValueError(f"Unknown reconciliation: {reconciliation!r}")
+        after_ec_len = max(0, remain_len - leaked_bits)
+
+        keep_len = int(np.floor(after_ec_len * privacy_amp_ratio))
+        if remain_A is not None:
+            with timer.stage("privacy_amplification"):
+                final_key = _privacy_amplify(remain_A, keep_len, pa_seed)
+                final_key_bob = _privacy_amplify(remain_B, keep_len, pa_seed)
+            timer.count_bytes(final_key.data, final_key_bob.data)
+            final_key_errors = final_key.errors(final_key_bob)
+        final_key_len = keep_len
+    else:
+        final_key_len = 0
+
+    return final_key, final_key_bob, {
+        "aborted": aborted,
+        "leaked_bits_ec": leaked_bits,
+        "reconciliation": reconciliation,
+        "ec_efficiency": ec_info.get("efficiency"),
+        "ec_passes": ec_info.get("passes"),
+        "ec_corrected_bits": ec_info.get("corrected_bits"),
+        "ec_residual_errors": ec_info.get("residual_errors"),
+        "after_ec_len": after_ec_len,
+        "final_key_len": final_key_len,
+        "final_key_errors": final_key_errors,
+        "final_keys_match": None if final_key_errors is None else final_key_errors == 0,
+        "pa_seed": pa_seed
+    }
+
+
+def _finalize_run(
+    alice_bits: np.ndarray,
+    bob_results: np.ndarray,
+    same_basis_mask: np.ndarray,
+    n_qubits: int,
+    eve_strategy: str,
+    channel_error_rate: float,
+    test_fraction: float,
+    ec_efficiency: float,
+    privacy_amp_ratio: float,
+    rng: np.random.Generator,
+    reconciliation: str = "cascade",
+    cascade_passes: int = 4,
+    cascade_block_size: Optional[int] = None,
+    timer=NULL_TIMER,
+    eve: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+) -> Dict:
+    # Sifting, parameter estimation and post-processing shared by all engines;
+    # ``eve`` is (eve_mask, eve_bits, eve_info) for Eve's knowledge of the key
+    with timer.stage("sifting"):
+        sifted_alice = BitKey.from_bits(alice_bits[same_basis_mask])
+        sifted_bob = BitKey.from_bits(bob_results[same_basis_mask])
+    timer.count_bytes(sifted_alice.data, sifted_bob.data)
+    sift_len = len(sifted_alice)
+    sift_rate = sift_len / n_qubits if n_qubits > 0 else 0.0
+
+    with timer.stage("parameter_estimation"):
+        if sift_len == 0:
+            observed_error_rate = None
+            test_size = 0
+            test_errors = 0
+        else:
+            test_size = max(1, int(np.ceil(test_fraction * sift_len)))
+            test_indices = rng.choice(sift_len, size=test_size, replace=False)
+            test_errors = sifted_alice.take(test_indices).errors(sifted_bob.take(test_indices))
+            observed_error_rate = test_errors / test_size
+
+        remaining_mask = np.ones(sift_len, dtype=bool)
+        if test_size > 0:
+            remaining_mask[test_indices] = False
+        remain_A = sifted_alice.compress(remaining_mask)
+        remain_B = sifted_bob.compress(remaining_mask)
+        eve_stats = eve_key_stats(alice_bits, same_basis_mask, remaining_mask, *eve) if eve is not None else {}
+    timer.count_bytes(remain_A.data, remain_B.data)
+
+    final_key, final_key_bob, pp_stats = _post_process(
+        remain_A, remain_B, len(remain_A), observed_error_rate, ec_efficiency, privacy_amp_ratio, rng,
+        reconciliation, cascade_passes, cascade_block_size, timer
+    )
+
+    stats = {
+        "n_qubits": n_qubits,
+        "sift_len": sift_len,
+        "sift_rate": sift_rate,
+        "test_size": test_size,
+        "test_errors": test_errors,
+        "observed_error_rate": observed_error_rate,
+        **pp_stats,
+        "eve_strategy": eve_strategy,
+        **eve_stats,
+        "channel_error_rate": channel_error_rate
+    }
+    if timer.enabled:
+        stats.update(timer.as_dict())
+
+    return {
+        "final": True,
+        "observed_error_rate": observed_error_rate,
+        "sift_rate": sift_rate,
+        "sifted_A": sifted_alice,
+        "sifted_B": sifted_bob,
+        "final_key": final_key,
+        "final_key_bob": final_key_bob,
+        "test_indices": test_indices if test_size > 0 else np.zeros(0, dtype=np.int64),
+        "stats": stats
+    }
+
+
+def _vectorized_bb84_arrays(n_qubits: int, eve_prob: float, rng: np.random.Generator, backend: MeasurementBackend,
+                            timer=NULL_TIMER, channel_error_rate: float = 0.0,
+                            strategy: Optional[EveStrategy] = None):
+    # Whole run as array operations; bases are encoded as 0 = Z, 1 = X. Eve's
+    # bits and information are returned for every qubit (zero where not intercepted).
+    strategy = strategy or get_strategy("intercept_random")
+    with timer.stage("state_preparation"):
+        alice_bits = rng.integers(0, 2, size=n_qubits, dtype=np.uint8)
+        alice_bases = rng.integers(0, 2, size=n_qubits, dtype=np.uint8)
+        bob_bases = rng.integers(0, 2, size=n_qubits, dtype=np.uint8)
+    timer.count_bytes(alice_bits, alice_bases, bob_bases)
+
+    # Eve intercepts each qubit with probability eve_prob and attacks it with the strategy
+    with timer.stage("eve_interception"):
+        eve_mask = rng.random(n_qubits) < eve_prob
+        n_eve = int(eve_mask.sum())
+        eve_bits = np.zeros(n_qubits, dtype=np.uint8)
+        eve_info = np.zeros(n_qubits, dtype=np.float32)
+        send_bits = alice_bits.copy()
+        send_bases = alice_bases.copy()
+        eve_bits[eve_mask], eve_info[eve_mask], send_bits[eve_mask], send_bases[eve_mask] = strategy.intercept(
+            alice_bits[eve_mask], alice_bases[eve_mask], rng, backend
+        )
+    if strategy.uses_backend:
+        timer.count("backend_calls")
+        timer.count("qubits_measured", n_eve)
+    timer.count_bytes(eve_mask, eve_bits, eve_info, send_bits, send_bases)
+
+    # Bob's outcome is deterministic in the matching basis, a fair coin otherwise
+    with timer.stage("measurement"):
+        bob_results = backend.measure_batch(send_bits, send_bases, bob_bases, rng)
+        direct = strategy.measure(alice_bits[eve_mask], alice_bases[eve_mask], eve_bits[eve_mask],
+                                  bob_bases[eve_mask], rng) if n_eve else None
+        if direct is not None:
+            bob_results[eve_mask] = direct
+        if channel_error_rate > 0:
+            bob_results ^= (rng.random(n_qubits) < channel_error_rate).astype(bob_results.dtype)
+    timer.count("backend_calls")
+    timer.count("qubits_measured", n_qubits)
+    timer.count_bytes(bob_results)
+
+    return alice_bits, alice_bases, bob_bases, bob_results, eve_mask, eve_bits, eve_info
+
+
+def _event_block(start: int, stop: int, alice_bits, alice_labels, bob_labels, bob_results, eve_mask,
+                 index=None) -> np.ndarray:
+    block = np.empty(stop - start, dtype=QUBIT_EVENT_DTYPE)
+    block["index"] = np.arange(start, stop) if index is None else index[start:stop]
+    block["alice_bit"] = alice_bits[start:stop]
+    block["alice_basis"] = alice_labels[start:stop]
+    block["bob_basis"] = bob_labels[start:stop]
+    block["bob_bit"] = bob_results[start:stop]
+    block["eve_intercepted"] = eve_mask[start:stop]
+    return block
+
+
+def _qubit_event(i: int, alice_bits, alice_labels, bob_labels, bob_results, eve_mask, index=None) -> Dict:
+    return {
+        "index": i if index is None else int(index[i]),
+        "alice_bit": int(alice_bits[i]),
+        "alice_basis": alice_labels[i],
+        "bob_basis": bob_labels[i],
+        "bob_bit": int(bob_results[i]),
+        "eve_intercepted": bool(eve_mask[i])
+    }
+
+
+def _iter_events(events: str, event_every: int, block_size: int, *arrays, index=None):
+    # arrays: alice_bits, alice_labels, bob_labels, bob_results, eve_mask; with a
+    # channel they hold detected pulses only and ``index`` gives their pulse numbers
+    n = len(arrays[0])
+    if events == "qubit":
+        for i in range(n):
+            yield _qubit_event(i, *arrays, index=index)
+    elif events == "sampled":
+        for i in range(0, n, event_every):
+            yield _qubit_event(i, *arrays, index=index)
+    elif events == "block":
+        for start in range(0, n, block_size):
+            yield _event_block(start, min(n, start + block_size), *arrays, index=index)
+
+
+def _check_events(events: str, event_every: int, block_size: int) -> None:
+    if events not in EVENT_GRANULARITIES:
+        raise ValueError(f"Unknown event granularity: {events!r}")
+    if event_every < 1 or block_size < 1:
+        raise ValueError("event_every and block_size must be positive")
+
+
+def _detect(channel: Optional[ChannelModel], n_pulses: int, rng: np.random.Generator, timer=NULL_TIMER):
+    # Pulse indices Bob detects and the dark-count mask; every pulse without a channel
+    if channel is None:
+        return None, None
+    with timer.stage("state_preparation"):
+        positions, dark = channel.sample_detections(n_pulses, rng)
+    timer.count("detections", len(positions))
+    return positions, dark
+
+
+def _simulate_vectorized(n_qubits, eve_prob, eve_strategy, channel_error_rate, test_fraction, ec_efficiency,
+                         privacy_amp_ratio, rng, backend, reconciliation, cascade_passes, cascade_block_size,
+                         channel=None, timer=NULL_TIMER):
+    # Returns (event arrays, pulse indices of those events or None, final summary)
+    backend = get_backend(backend or "numpy")
+    strategy = get_strategy(eve_strategy)
+    positions, dark = _detect(channel, n_qubits, rng, timer)
+    n_events = n_qubits if positions is None else len(positions)
+    alice_bits, alice_bases, bob_bases, bob_results, eve_mask, eve_bits, eve_info = _vectorized_bb84_arrays(
+        n_events, eve_prob, rng, backend, timer, channel_error_rate, strategy
+    )
+    if channel is not None:
+        with timer.stage("measurement"):
+            bob_results = channel.detect(bob_results, dark, rng)
+    final = _finalize_run(
+        alice_bits, bob_results, alice_bases == bob_bases, n_qubits, strategy.name,
+        channel_error_rate, test_fraction, ec_efficiency, privacy_amp_ratio, rng,
+        reconciliation, cascade_passes, cascade_block_size, timer, (eve_mask, eve_bits, eve_info)
+    )
+    if channel is not None:
+        stats = final["stats"]
+        stats.update(channel.rates(n_qubits, n_events, int(dark.sum()), stats["sift_len"], stats["final_key_len"]))
+    arrays = (alice_bits, _BASIS_LABELS[alice_bases], _BASIS_LABELS[bob_bases], bob_results, eve_mask)
+    return arrays, positions, final
+
+
+def run_bb84(
+    n_qubits: int = 500,
+    eve_prob: float = 0.0,
+    eve_strategy: str = "intercept_random",
+    channel_error_rate: float = 0.0,
+    test_fraction: float = 0.2,
+    ec_efficiency: float = 1.15,
+    privacy_amp_ratio: float = 0.5,
+    rng: Optional[np.random.Generator] = None,
+    engine: str = "vectorized",
+    backend: Optional[Union[str, MeasurementBackend]] = None,
+    reconciliation: str = "cascade",
+    cascade_passes: int = 4,
+    cascade_block_size: Optional[int] = None,
+    channel: Optional[ChannelModel] = None,
+    profile: Union[bool, StageTimer] = False
+) -> Dict:
+    """Run a BB84 simulation to completion and return the final summary dict.
+
+    Takes the same options as ``simulate_bb84_stream`` but never builds per-qubit
+    events; the vectorized engine does not create a generator at all.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    if engine == "vectorized":
+        return _simulate_vectorized(
+            n_qubits, eve_prob, eve_strategy, channel_error_rate, test_fraction, ec_efficiency,
+            privacy_amp_ratio, rng, backend, reconciliation, cascade_passes, cascade_block_size, channel,
+            get_timer(profile)
+        )[2]
+    for data in simulate_bb84_stream(
+        n_qubits, eve_prob, eve_strategy, channel_error_rate, test_fraction, ec_efficiency, privacy_amp_ratio,
+        rng, engine, backend, reconciliation, cascade_passes, cascade_block_size, channel=channel, events="none",
+        profile=profile
+    ):
+        pass
+    return data
+
+
 def simulate_bb84_stream(
     n_qubits: int = 500,
     eve_prob: float = 0.0,
@@ -32,114 +373,247 @@ def simulate_bb84_stream(
     test_fraction: float = 0.2,
     ec_efficiency: float = 1.15,
     privacy_amp_ratio: float = 0.5,
-    rng: Optional[np.random.Generator] = None
+    rng: Optional[np.random.Generator] = None,
+    engine: str = "vectorized",
+    backend: Optional[Union[str, MeasurementBackend]] = None,
+    reconciliation: str = "cascade",
+    cascade_passes: int = 4,
+    cascade_block_size: Optional[int] = None,
+    channel: Optional[ChannelModel] = None,
+    events: str = "qubit",
+    event_every: int = 1,
+    block_size: int = 4096,
+    profile: Union[bool, StageTimer] = False
 ):
+    """Stream a BB84 run, yielding qubit events followed by the final summary.
+
+    ``engine`` selects how the qubits are simulated: ``"vectorized"`` builds the
+    whole run with NumPy array operations, ``"per_qubit"`` measures every qubit
+    through a single-qubit measurement backend. ``backend`` is a name from
+    ``qnode.BACKENDS`` or an instance; it defaults to ``"numpy"`` for the
+    vectorized engine and ``"pennylane"`` for the per-qubit engine.
+
+    ``reconciliation="cascade"`` corrects Bob's key with Cascade and reports the
+    parity bits actually disclosed; ``"estimate"`` keeps the binary-entropy
+    leakage formula scaled by ``ec_efficiency``.
+
+    ``channel_error_rate`` flips each of Bob's outcomes with that probability.
+    A ``channel.ChannelModel`` (vectorized engine only) adds fiber loss, detector
+    efficiency, dark counts and depolarization: only the pulses Bob detects are
+    simulated, found by geometric skip-ahead, so ``n_qubits`` counts pulses and
+    event ``index`` values are pulse numbers. ``stats`` then also holds the
+    detection counts and raw/sifted/final key rates per second of link time.
+
+    ``events`` sets the event granularity: ``"qubit"`` yields a dict per qubit,
+    ``"sampled"`` a dict every ``event_every`` qubits, ``"block"`` a
+    ``QUBIT_EVENT_DTYPE`` structured array per ``block_size`` qubits and
+    ``"none"`` only the final summary (see also ``run_bb84``).
+
+    ``profile=True`` (or a ``StageTimer``) records per-stage wall time and
+    counters and adds them to ``stats`` as ``timings`` and ``counters``.
+    """
+    _check_events(events, event_every, block_size)
     if rng is None:
         rng = np.random.default_rng()
+    timer = get_timer(profile)
+
+    if engine == "vectorized":
+        arrays, positions, final = _simulate_vectorized(
+            n_qubits, eve_prob, eve_strategy, channel_error_rate, test_fraction, ec_efficiency,
+            privacy_amp_ratio, rng, backend, reconciliation, cascade_passes, cascade_block_size, channel, timer
+        )
+        yield from _iter_events(events, event_every, block_size, *arrays, index=positions)
+        yield final
+        return
 
-    alice_bits = rng.integers(0, 2, size=n_qubits)
-    alice_bases = rng.choice(['Z', 'X'], size=n_qubits)
-    bob_bases = rng.choice(['Z', 'X'], size=n_qubits)
-    bob_results = np.zeros(n_qubits, dtype=int)
+    if engine != "per_qubit":
+        raise ValueError(f"Unknown engine: {engine!r}")
+    if channel is not None:
+        raise ValueError("The channel model requires the vectorized engine")
+    strategy = get_strategy(eve_strategy)
+    if strategy.name != "intercept_random":
+        raise ValueError(f"The per-qubit engine only supports intercept_random, not {strategy.name!r}")
 
-    eve_memory = {'Z': 0, 'X': 0, 'total': 0}
+    backend = get_backend(backend or "pennylane")
+
+    with timer.stage("state_preparation"):
+        alice_bits = rng.integers(0, 2, size=n_qubits)
+        alice_bases = rng.choice(['Z', 'X'], size=n_qubits)
+        bob_bases = rng.choice(['Z', 'X'], size=n_qubits)
+        bob_results = np.zeros(n_qubits, dtype=int)
+        eve_mask = np.zeros(n_qubits, dtype=bool)
+        eve_bits = np.zeros(n_qubits, dtype=np.uint8)
+        eve_info = np.zeros(n_qubits, dtype=np.float32)
+    arrays = (alice_bits, alice_bases, bob_bases, bob_results, eve_mask)
+    timer.count_bytes(*arrays)
+    # Eve's and Bob's per-qubit measurements are interleaved, so both are timed as "measurement"
+    loop_start = time.perf_counter() if timer.enabled else 0.0
 
     # Will collect sifted bits after loop to finalize
     for i in range(n_qubits):
         a_bit = int(alice_bits[i])
         a_basis = alice_bases[i]
         b_basis = bob_bases[i]
-        intercepted = False
 
         if rng.random() < eve_prob:
             # Eve chooses basis and measures
             e_basis = rng.choice(['Z', 'X'])  # or adaptive
-            eve_meas = int(measure_qubit(a_bit, a_basis, e_basis))
+            eve_meas = backend.measure(a_bit, a_basis, e_basis, rng)
+            timer.count("backend_calls")
             send_bit = eve_meas
             send_basis = e_basis
-            intercepted = True
+            eve_mask[i] = True
+            eve_bits[i] = eve_meas
+            eve_info[i] = e_basis == a_basis
         else:
             send_bit = a_bit
             send_basis = a_basis
 
-        bob_results[i] = int(measure_qubit(send_bit, send_basis, b_basis))
-        
+        bob_results[i] = backend.measure(send_bit, send_basis, b_basis, rng)
+        timer.count("backend_calls")
+        if channel_error_rate > 0 and rng.random() < channel_error_rate:
+            bob_results[i] ^= 1
+
         # Yield current qubit info so caller can update Bloch sphere etc.
-        yield {
-            "index": i,
-            "alice_bit": a_bit,
-            "alice_basis": a_basis,
-            "bob_basis": b_basis,
-            "bob_bit": bob_results[i],
-            "eve_intercepted": intercepted
-        }
-
-    # After processing all qubits, sift
-    same_basis_mask = (alice_bases == bob_bases)
-    sifted_alice = alice_bits[same_basis_mask]
-    sifted_bob = bob_results[same_basis_mask]
-    sift_len = len(sifted_alice)
-    sift_rate = sift_len / n_qubits if n_qubits > 0 else 0.0
+        if events == "qubit" or (events == "sampled" and i % event_every == 0):
+            yield _qubit_event(i, *arrays)
+        elif events == "block" and ((i + 1) % block_size == 0 or i == n_qubits - 1):
+            yield _event_block(i - i % block_size, i + 1, *arrays)
 
-    if sift_len == 0:
-        observed_error_rate = None
-        test_size = 0
-        test_errors = 0
-    else:
-        test_size = max(1, int(np.ceil(test_fraction * sift_len)))
-        test_indices = rng.choice(sift_len, size=test_size, replace=False)
-        test_errors = int(np.sum(sifted_alice[test_indices] != sifted_bob[test_indices]))
-        observed_error_rate = test_errors / test_size
+    if timer.enabled:
+        timer.add_time("measurement", time.perf_counter() - loop_start)
+        timer.count("qubits_measured", n_qubits + int(eve_mask.sum()))
 
-    abort_threshold = 0.15
-    aborted = False
-    if observed_error_rate is not None and observed_error_rate > abort_threshold:
-        aborted = True
+    # After processing all qubits, sift and finalize
+    yield _finalize_run(
+        alice_bits, bob_results, alice_bases == bob_bases, n_qubits, strategy.name,
+        channel_error_rate, test_fraction, ec_efficiency, privacy_amp_ratio, rng,
+        reconciliation, cascade_passes, cascade_block_size, timer, (eve_mask, eve_bits, eve_info)
+    )
 
-    final_key = []
-    leaked_bits = 0
-    after_ec_len = 0
 
-    if not aborted and sift_len > 0:
-        remaining_mask = np.ones(sift_len, dtype=bool)
-        if test_size > 0:
-            remaining_mask[test_indices] = False
-        remain_A = sifted_alice[remaining_mask]
-        remain_B = sifted_bob[remaining_mask]
-        remain_len = len(remain_A)
+def simulate_bb84_blocks(
+    n_qubits: int,
+    block_size: int = 1 << 20,
+    eve_prob: float = 0.0,
+    eve_strategy: str = "intercept_random",
+    channel_error_rate: float = 0.0,
+    test_fraction: float = 0.2,
+    ec_efficiency: float = 1.15,
+    privacy_amp_ratio: float = 0.5,
+    rng: Optional[np.random.Generator] = None,
+    backend: Optional[Union[str, MeasurementBackend]] = None,
+    keep_key: bool = False,
+    reconciliation: str = "cascade",
+    cascade_passes: int = 4,
+    cascade_block_size: Optional[int] = None,
+    channel: Optional[ChannelModel] = None,
+    profile: Union[bool, StageTimer] = False
+):
+    """Stream a long BB84 run in fixed-size blocks with bounded working memory.
 
-        qber_est = observed_error_rate if observed_error_rate is not None else 0.0
+    Each block of ``block_size`` pulses is generated, sifted and tested on its own,
+    and a ``BLOCK_SUMMARY_DTYPE`` record with running sift rate and QBER is yielded.
+    Sifted bits join the test set independently with probability ``test_fraction``.
+    The last item is the usual final summary dict. With ``keep_key=False`` no key
+    material is retained, so memory stays O(block_size) for any ``n_qubits`` and
+    key lengths use the leakage estimate; ``keep_key=True`` accumulates the packed
+    non-test bits (returned as ``sifted_A``/``sifted_B``) for Cascade and privacy
+    amplification. ``channel`` and ``channel_error_rate`` are applied per block
+    as in ``simulate_bb84_stream``.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    backend = get_backend(backend or "numpy")
+    strategy = get_strategy(eve_strategy)
+    timer = get_timer(profile)
 
-        leaked_bits = _simple_error_correction_length(remain_len, qber_est, efficiency=ec_efficiency)
-        after_ec_len = max(0, remain_len - leaked_bits)
+    builder_A = BitKeyBuilder() if keep_key else None
+    builder_B = BitKeyBuilder() if keep_key else None
+    total_pulses = total_sifted = total_test = total_errors = 0
+    total_detections = total_dark = 0
+    eve_totals = {"eve_key_bits": 0, "eve_key_matches": 0, "eve_information_bits": 0.0}
 
-        keep_len = int(np.floor(after_ec_len * privacy_amp_ratio))
-        final_key = _privacy_amplify(list(remain_A), keep_len)
-    else:
-        final_key = []
+    for block, start in enumerate(range(0, n_qubits, block_size)):
+        pulses = min(block_size, n_qubits - start)
+        positions, dark = _detect(channel, pulses, rng, timer)
+        n_events = pulses if positions is None else len(positions)
+        alice_bits, alice_bases, bob_bases, bob_results, eve_mask, eve_bits, eve_info = _vectorized_bb84_arrays(
+            n_events, eve_prob, rng, backend, timer, channel_error_rate, strategy
+        )
+        if channel is not None:
+            with timer.stage("measurement"):
+                bob_results = channel.detect(bob_results, dark, rng)
+            total_dark += int(dark.sum())
+        total_detections += n_events
+        with timer.stage("sifting"):
+            same = alice_bases == bob_bases
+            sifted_A = alice_bits[same]
+            sifted_B = bob_results[same]
+        with timer.stage("parameter_estimation"):
+            in_test = rng.random(len(sifted_A)) < test_fraction
+            test_errors = int(np.count_nonzero(sifted_A[in_test] != sifted_B[in_test]))
+            if keep_key:
+                builder_A.append(sifted_A[~in_test])
+                builder_B.append(sifted_B[~in_test])
+            for key, value in eve_key_stats(alice_bits, same, ~in_test, eve_mask, eve_bits, eve_info).items():
+                if key in eve_totals:
+                    eve_totals[key] += value
+
+        total_pulses += pulses
+        total_sifted += len(sifted_A)
+        total_test += int(np.count_nonzero(in_test))
+        total_errors += test_errors
+
+        summary = np.zeros((), dtype=BLOCK_SUMMARY_DTYPE)
+        summary["block"] = block
+        summary["pulses"] = pulses
+        summary["sifted"] = len(sifted_A)
+        summary["test_bits"] = int(np.count_nonzero(in_test))
+        summary["test_errors"] = test_errors
+        summary["total_pulses"] = total_pulses
+        summary["total_sifted"] = total_sifted
+        summary["running_sift_rate"] = total_sifted / total_pulses
+        summary["running_qber"] = total_errors / total_test if total_test else np.nan
+        yield summary
+
+    sift_rate = total_sifted / n_qubits if n_qubits > 0 else 0.0
+    observed_error_rate = total_errors / total_test if total_test else None
+    remain_A = builder_A.build() if keep_key else None
+    remain_B = builder_B.build() if keep_key else None
+
+    final_key, final_key_bob, pp_stats = _post_process(
+        remain_A, remain_B, total_sifted - total_test, observed_error_rate, ec_efficiency, privacy_amp_ratio, rng,
+        reconciliation, cascade_passes, cascade_block_size, timer
+    )
 
     stats = {
         "n_qubits": n_qubits,
-        "sift_len": sift_len,
+        "sift_len": total_sifted,
         "sift_rate": sift_rate,
-        "test_size": test_size,
-        "test_errors": test_errors,
+        "test_size": total_test,
+        "test_errors": total_errors,
         "observed_error_rate": observed_error_rate,
-        "aborted": aborted,
-        "leaked_bits_ec": leaked_bits,
-        "after_ec_len": after_ec_len,
-        "final_key_len": len(final_key),
-        "eve_strategy": eve_strategy,
-        "channel_error_rate": channel_error_rate
+        **pp_stats,
+        "eve_strategy": strategy.name,
+        **eve_totals,
+        "eve_information_rate": eve_totals["eve_information_bits"] / (total_sifted - total_test)
+        if total_sifted > total_test else 0.0,
+        "channel_error_rate": channel_error_rate,
+        "block_size": block_size
     }
+    if channel is not None:
+        stats.update(channel.rates(n_qubits, total_detections, total_dark, total_sifted, stats["final_key_len"]))
+    if timer.enabled:
+        stats.update(timer.as_dict())
 
-    # Yield final summary at the end (optional)
     yield {
         "final": True,
         "observed_error_rate": observed_error_rate,
         "sift_rate": sift_rate,
-        "sifted_A": sifted_alice.tolist(),
-        "sifted_B": sifted_bob.tolist(),
+        "sifted_A": remain_A if keep_key else BitKey.empty(),
+        "sifted_B": remain_B if keep_key else BitKey.empty(),
         "final_key": final_key,
+        "final_key_bob": final_key_bob,
         "stats": stats
     }
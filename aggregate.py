@@ -0,0 +1,243 @@
+"""Streaming, mergeable aggregates of trial summaries.
+
+Batches fold every trial into a ``TrialAggregate`` as it finishes, so memory
+does not grow with the number of trials. Aggregates from different chunks or
+processes combine with ``merge`` and round-trip through ``to_dict`` /
+``from_dict`` for checkpoints. Folding the same trials in the same order gives
+bit-identical results.
+"""
+import math
+import numpy as np
+from typing import Dict, Optional, Sequence
+
+# Quantiles reported for the error rate and the final key length
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class RunningStats:
+    """Count, mean, variance (Welford), minimum and maximum of a stream of values."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def add_many(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        chunk = RunningStats()
+        chunk.count = len(values)
+        chunk.mean = float(values.mean())
+        chunk.m2 = float(((values - chunk.mean) ** 2).sum())
+        chunk.min = float(values.min())
+        chunk.max = float(values.max())
+        self.merge(chunk)
+
+    def merge(self, other: "RunningStats") -> None:
+        # Chan et al. parallel update
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Population variance (ddof=0), like ``np.var``."""
+        return self.m2 / self.count if self.count else None
+
+    @property
+    def std(self) -> Optional[float]:
+        return math.sqrt(self.m2 / self.count) if self.count else None
+
+    def as_dict(self) -> Dict:
+        if not self.count:
+            return {"count": 0, "mean": None, "std": None, "min": None, "max": None}
+        return {"count": self.count, "mean": self.mean, "std": self.std, "min": self.min, "max": self.max}
+
+    def to_dict(self) -> Dict:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2,
+                "min": None if self.count == 0 else self.min, "max": None if self.count == 0 else self.max}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "RunningStats":
+        stats = cls()
+        stats.count, stats.mean, stats.m2 = state["count"], state["mean"], state["m2"]
+        if stats.count:
+            stats.min, stats.max = state["min"], state["max"]
+        return stats
+
+
+class QuantileSketch:
+    """Relative-error quantile sketch of non-negative values (DDSketch style).
+
+    Values fall into logarithmic buckets of ratio ``(1 + alpha) / (1 - alpha)``,
+    so every quantile is returned within relative error ``alpha``; values up to
+    ``min_value`` share a zero bucket. The bucket count grows with the log of the
+    value range, not with the number of values.
+    """
+
+    def __init__(self, alpha: float = 0.01, min_value: float = 1e-9):
+        self.alpha = alpha
+        self.min_value = min_value
+        self._log_gamma = math.log((1 + alpha) / (1 - alpha))
+        self.zero_count = 0
+        self.buckets: Dict[int, int] = {}
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.buckets.values())
+
+    def add(self, x: float) -> None:
+        if x <= self.min_value:
+            self.zero_count += 1
+        else:
+            i = math.ceil(math.log(x) / self._log_gamma)
+            self.buckets[i] = self.buckets.get(i, 0) + 1
+
+    def add_many(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        positive = values[values > self.min_value]
+        self.zero_count += len(values) - len(positive)
+        if len(positive):
+            index, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64),
+                                      return_counts=True)
+            for i, c in zip(index.tolist(), counts.tolist()):
+                self.buckets[i] = self.buckets.get(i, 0) + c
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.alpha != self.alpha:
+            raise ValueError("Cannot merge sketches with different alpha")
+        self.zero_count += other.zero_count
+        for i, c in other.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + c
+
+    def quantile(self, q: float) -> Optional[float]:
+        n = self.count
+        if n == 0:
+            return None
+        rank = q * (n - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if rank < seen:
+                gamma = math.exp(self._log_gamma)
+                return 2 * gamma ** i / (gamma + 1)
+        return None
+
+    def to_dict(self) -> Dict:
+        return {"alpha": self.alpha, "min_value": self.min_value, "zero_count": self.zero_count,
+                "buckets": {str(i): c for i, c in sorted(self.buckets.items())}}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "QuantileSketch":
+        sketch = cls(state["alpha"], state["min_value"])
+        sketch.zero_count = state["zero_count"]
+        sketch.buckets = {int(i): c for i, c in state["buckets"].items()}
+        return sketch
+
+
+class TrialAggregate:
+    """Running statistics over trial summaries (the dicts of ``runner._run_trial``).
+
+    ``observed_error_rate`` is None for a trial with nothing sifted; batches
+    leave such trials out of the error statistics, while ``none_as_zero=True``
+    (sweeps) counts them as zero error.
+    """
+
+    def __init__(self, none_as_zero: bool = False, alpha: float = 0.01):
+        self.none_as_zero = none_as_zero
+        self.trials = 0
+        self.aborted = 0
+        self.error = RunningStats()
+        self.sift = RunningStats()
+        self.key_len = RunningStats()
+        self.wall_time = RunningStats()
+        self.error_sketch = QuantileSketch(alpha)
+        self.key_sketch = QuantileSketch(alpha)
+
+    def add(self, summary: Dict) -> None:
+        self.trials += 1
+        self.aborted += bool(summary["aborted"])
+        err = summary["observed_error_rate"]
+        if err is None and self.none_as_zero:
+            err = 0.0
+        if err is not None:
+            self.error.add(err)
+            self.error_sketch.add(err)
+        self.sift.add(summary["sift_rate"])
+        self.key_len.add(summary["final_key_len"])
+        self.key_sketch.add(summary["final_key_len"])
+        if "wall_time" in summary:
+            self.wall_time.add(summary["wall_time"])
+
+    def add_chunk(self, chunk) -> None:
+        """Fold a vectorized chunk of trials (``analytic.sample_trials`` or ``grid`` rows)."""
+        errs = np.asarray(chunk["observed_error_rate"], dtype=np.float64)
+        errs = np.nan_to_num(errs) if self.none_as_zero else errs[~np.isnan(errs)]
+        self.trials += len(chunk["sift_rate"])
+        self.aborted += int(np.count_nonzero(chunk["aborted"]))
+        self.error.add_many(errs)
+        self.error_sketch.add_many(errs)
+        self.sift.add_many(chunk["sift_rate"])
+        self.key_len.add_many(chunk["final_key_len"])
+        self.key_sketch.add_many(chunk["final_key_len"])
+
+    def merge(self, other: "TrialAggregate") -> None:
+        self.trials += other.trials
+        self.aborted += other.aborted
+        for name in ("error", "sift", "key_len", "wall_time", "error_sketch", "key_sketch"):
+            getattr(self, name).merge(getattr(other, name))
+
+    def result(self, quantiles: Sequence[float] = QUANTILES) -> Dict:
+        """Summary statistics; the first three keys match the historical batch result."""
+        def q_name(q):
+            return f"p{q * 100:g}"
+
+        return {
+            "mean_error": self.error.mean if self.error.count else None,
+            "std_error": self.error.std,
+            "mean_sift": self.sift.mean if self.sift.count else None,
+            "aborted": self.aborted,
+            "abort_rate": self.aborted / self.trials if self.trials else None,
+            "error_quantiles": {q_name(q): self.error_sketch.quantile(q) for q in quantiles},
+            "key_len": {**self.key_len.as_dict(),
+                        **{q_name(q): self.key_sketch.quantile(q) for q in quantiles}},
+            "trial_time": self.wall_time.as_dict()
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "none_as_zero": self.none_as_zero,
+            "trials": self.trials,
+            "aborted": self.aborted,
+            **{name: getattr(self, name).to_dict()
+               for name in ("error", "sift", "key_len", "wall_time", "error_sketch", "key_sketch")}
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "TrialAggregate":
+        agg = cls(state["none_as_zero"], state["error_sketch"]["alpha"])
+        agg.trials, agg.aborted = state["trials"], state["aborted"]
+        for name in ("error", "sift", "key_len", "wall_time"):
+            setattr(agg, name, RunningStats.from_dict(state[name]))
+        for name in ("error_sketch", "key_sketch"):
+            setattr(agg, name, QuantileSketch.from_dict(state[name]))
+        return agg
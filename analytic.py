@@ -0,0 +1,139 @@
+import numpy as np
+from typing import Dict, Optional
+from BB84 import ABORT_THRESHOLD, run_bb84
+from eve import get_strategy
+
+# Trials sampled per vectorized call; bounds working memory for very large batches
+CHUNK_TRIALS = 1 << 20
+
+
+def _leakage(remain_len: np.ndarray, qber: np.ndarray, efficiency: float) -> np.ndarray:
+    # Vectorized _simple_error_correction_length
+    q = np.clip(qber, 1e-12, 1 - 1e-12)
+    hq = -q * np.log2(q) - (1 - q) * np.log2(1 - q)
+    leaked = np.ceil(efficiency * hq * remain_len).astype(np.int64)
+    return np.where(remain_len > 0, np.minimum(leaked, remain_len), 0)
+
+
+def sample_trials(n_qubits: int, eve_prob: float, test_fraction: float, trials: int,
+                  rng: Optional[np.random.Generator] = None, ec_efficiency: float = 1.15,
+                  privacy_amp_ratio: float = 0.5, eve_strategy: str = "intercept_random") -> Dict[str, np.ndarray]:
+    """Sample per-trial BB84 statistics directly from their distributions.
+
+    The sifted length is Binomial(n, 1/2) and each sifted bit is wrong with
+    probability eve_prob times the strategy's ``induced_qber`` (1/4 for
+    intercept-resend with a random basis).
+    The test set is drawn without replacement, so its error count is
+    hypergeometric given the sifted errors. Leakage uses the binary-entropy
+    estimate (``reconciliation="estimate"``), as Cascade has no closed form.
+
+    Returns arrays of length ``trials``; ``observed_error_rate`` is NaN for trials
+    with nothing sifted.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    sift_len = rng.binomial(n_qubits, 0.5, size=trials)
+    sift_errors = rng.binomial(sift_len, eve_prob * get_strategy(eve_strategy).induced_qber)
+    return trial_outcomes(n_qubits, sift_len, sift_errors, test_fraction, rng, ec_efficiency, privacy_amp_ratio)
+
+
+def trial_outcomes(n_qubits: int, sift_len: np.ndarray, sift_errors: np.ndarray, test_fraction: float,
+                   rng: np.random.Generator, ec_efficiency: float = 1.15,
+                   privacy_amp_ratio: float = 0.5) -> Dict[str, np.ndarray]:
+    """Test sampling, abort decision and key lengths from per-trial sifted error counts.
+
+    Works on arrays of any shape. The test-set error count is drawn from the
+    hypergeometric law, which is exactly the distribution of errors in a random
+    test subset of the sifted key.
+    """
+    shape = np.shape(sift_len)
+    test_size = np.where(sift_len > 0, np.maximum(1, np.ceil(test_fraction * sift_len)), 0).astype(np.int64)
+    test_errors = np.zeros(shape, dtype=np.int64)
+    has_test = test_size > 0
+    test_errors[has_test] = rng.hypergeometric(sift_errors[has_test], (sift_len - sift_errors)[has_test],
+                                               test_size[has_test])
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        observed = np.where(has_test, test_errors / np.maximum(test_size, 1), np.nan)
+    aborted = has_test & (observed > ABORT_THRESHOLD)
+    remain_len = sift_len - test_size
+    leaked = np.where(aborted, 0, _leakage(remain_len, np.nan_to_num(observed), ec_efficiency))
+    after_ec = np.where(aborted, 0, np.maximum(0, remain_len - leaked))
+    final_key_len = np.floor(after_ec * privacy_amp_ratio).astype(np.int64)
+    return {
+        "sift_len": sift_len,
+        "sift_rate": sift_len / n_qubits if n_qubits > 0 else np.zeros(shape),
+        "test_size": test_size,
+        "test_errors": test_errors,
+        "observed_error_rate": observed,
+        "aborted": aborted,
+        "leaked_bits_ec": leaked,
+        "final_key_len": final_key_len
+    }
+
+
+def trial_summary(n_qubits: int, eve_prob: float, test_fraction: float, rng: np.random.Generator,
+                  eve_strategy: str = "intercept_random") -> Dict:
+    """One sampled trial in the summary format of ``runner._run_trial``."""
+    s = sample_trials(n_qubits, eve_prob, test_fraction, 1, rng, eve_strategy=eve_strategy)
+    observed = float(s["observed_error_rate"][0])
+    return {
+        "observed_error_rate": None if np.isnan(observed) else observed,
+        "sift_rate": float(s["sift_rate"][0]),
+        "final_key_len": int(s["final_key_len"][0]),
+        "aborted": bool(s["aborted"][0])
+    }
+
+
+def validate(n_qubits: int = 1000, eve_prob: float = 0.5, test_fraction: float = 0.2, trials: int = 400,
+             engine: str = "per_qubit", backend: Optional[str] = "numpy", seed=None, alpha: float = 0.01,
+             eve_strategy: str = "intercept_random") -> Dict:
+    """Goodness-of-fit check of ``sample_trials`` against a simulated engine.
+
+    Runs ``trials`` simulations with ``engine`` (estimate reconciliation, so the
+    leakage model is the same) and compares each statistic with as many sampled
+    trials using a two-sample Kolmogorov-Smirnov test, plus a chi-square test of
+    the simulated sift lengths against the exact Binomial(n, 1/2) law. ``passed``
+    is True when no p-value falls below ``alpha``. Both sides model Eve with
+    ``eve_strategy``; the per-qubit engine only supports intercept_random.
+    """
+    from scipy import stats
+
+    seed_seq = np.random.SeedSequence(seed)
+    sim_seq, stat_seq = seed_seq.spawn(2)
+    runs = [run_bb84(n_qubits, eve_prob, test_fraction=test_fraction, rng=np.random.default_rng(child),
+                     engine=engine, backend=backend, reconciliation="estimate", eve_strategy=eve_strategy)["stats"]
+            for child in sim_seq.spawn(trials)]
+    sampled = sample_trials(n_qubits, eve_prob, test_fraction, trials, np.random.default_rng(stat_seq),
+                            eve_strategy=eve_strategy)
+
+    p_values = {}
+    for key in ("sift_len", "test_errors", "final_key_len"):
+        simulated = np.array([r[key] for r in runs])
+        p_values[key] = float(stats.ks_2samp(simulated, sampled[key]).pvalue)
+
+    # Chi-square of the simulated sift lengths, merging adjacent lengths so every bin expects >= 5:
+    # one pass from the tail closes a bin whenever it reaches 5, the short head joins the first bin
+    sift = np.array([r["sift_len"] for r in runs])
+    expected = stats.binom.pmf(np.arange(n_qubits + 1), n_qubits, 0.5) * trials
+    starts, acc = [], 0.0
+    for k in range(n_qubits, -1, -1):
+        acc += expected[k]
+        if acc >= 5:
+            starts.append(k)
+            acc = 0.0
+    starts = starts[::-1]
+    if len(starts) > 1:
+        starts[0] = 0
+        expected_counts = np.add.reduceat(expected, starts)
+        observed_counts = np.bincount(np.searchsorted(starts, sift, side="right") - 1, minlength=len(starts))
+        p_values["sift_len_binomial"] = float(stats.chisquare(observed_counts, expected_counts).pvalue)
+
+    return {
+        "engine": engine,
+        "eve_strategy": eve_strategy,
+        "trials": trials,
+        "p_values": p_values,
+        "alpha": alpha,
+        "passed": all(p >= alpha for p in p_values.values())
+    }
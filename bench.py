@@ -0,0 +1,178 @@
+"""Benchmark suite for the simulation, post-processing and runner hot paths.
+
+    python bench.py                              # run and print
+    python bench.py --save baseline.json         # store a JSON baseline
+    python bench.py --compare baseline.json      # fail on slowdowns > --max-slowdown
+
+Each case reports its best wall time over --repeat runs, a throughput figure
+(qubits/s, bits/s, calls/s or trials/s) and the peak memory traced by
+tracemalloc during one extra run.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+# Subprocesses run from the repository so its modules import from any working directory
+_REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+def _import_time(module: str) -> float:
+    # Fresh interpreter so nothing is already cached in sys.modules
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=_REPO)
+    return float(out.stdout.strip())
+
+
+def _cases(quick: bool):
+    from BB84 import _privacy_amplify, _simple_error_correction_length, simulate_bb84_stream
+    from keys import BitKey
+    from reconcile import cascade
+    from runner import batch_run_bb84
+
+    qubit_counts = [1_000, 100_000] if quick else [1_000, 100_000, 1_000_000]
+    key_lengths = [10_000, 100_000] if quick else [10_000, 100_000, 1_000_000]
+
+    def stream(n, eve_prob, events):
+        def run():
+            for _ in simulate_bb84_stream(n, eve_prob, rng=np.random.default_rng(0), events=events):
+                pass
+        return run
+
+    for n in qubit_counts:
+        for eve_prob in (0.0, 0.5):
+            yield f"simulate_bb84_stream[n={n},eve={eve_prob}]", stream(n, eve_prob, "none"), n, "qubits/s"
+    yield "simulate_bb84_stream[n=100000,events=qubit]", stream(100_000, 0.5, "qubit"), 100_000, "qubits/s"
+
+    try:
+        from qnode import measure_qubit
+        measure_qubit(1, 'X', 'Z')  # build the QNode outside the timed region
+        yield "measure_qubit[single]", lambda: measure_qubit(1, 'X', 'Z'), 1, "calls/s"
+    except ImportError:
+        pass
+
+    rng = np.random.default_rng(0)
+    for n in key_lengths:
+        a = rng.integers(0, 2, n, dtype=np.uint8)
+        b = a ^ (rng.random(n) < 0.03).astype(np.uint8)
+        key_a, key_b = BitKey.from_bits(a), BitKey.from_bits(b)
+        yield f"_privacy_amplify[n={n}]", lambda k=key_a, n=n: _privacy_amplify(k, n // 4, 1), n, "bits/s"
+        yield f"_simple_error_correction_length[n={n}]", \
+            lambda n=n: _simple_error_correction_length(n, 0.03), n, "bits/s"
+        yield f"cascade[n={n}]", \
+            lambda ka=key_a, kb=key_b: cascade(ka, kb, 0.03, rng=np.random.default_rng(0)), n, "bits/s"
+
+    trials = 20 if quick else 100
+    yield f"batch_run_bb84[n=2000,trials={trials}]", \
+        lambda: batch_run_bb84(2000, 0.5, 0.2, trials, seed=0), trials, "trials/s"
+
+
+def run_benchmarks(repeat: int = 3, quick: bool = False, name_filter: str = "") -> dict:
+    results = {}
+    for name, fn, units, unit_name in _cases(quick):
+        if name_filter and name_filter not in name:
+            continue
+        fn()  # warm-up
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[name] = {
+            "seconds": best,
+            "throughput": units / best if best > 0 else None,
+            "unit": unit_name,
+            "peak_mem_bytes": peak
+        }
+        print(f"{name:50s} {best * 1e3:10.3f} ms {units / best:14.1f} {unit_name:9s} "
+              f"{peak / 2**20:8.1f} MiB", flush=True)
+
+    for module in ("BB84", "runner", "cli"):
+        if name_filter and name_filter not in f"import[{module}]":
+            continue
+        best = min(_import_time(module) for _ in range(repeat))
+        results[f"import[{module}]"] = {"seconds": best, "throughput": None, "unit": None, "peak_mem_bytes": None}
+        print(f"{'import[' + module + ']':50s} {best * 1e3:10.3f} ms", flush=True)
+
+    if not name_filter or name_filter in "cli_startup":
+        best = min(_cli_startup() for _ in range(repeat))
+        results["cli_startup"] = {"seconds": best, "throughput": None, "unit": None, "peak_mem_bytes": None}
+        print(f"{'cli_startup':50s} {best * 1e3:10.3f} ms", flush=True)
+    return results
+
+
+def _cli_startup() -> float:
+    # Whole process: interpreter start, CLI imports and a one-qubit run
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(_REPO, "cli.py"), "single", "--n-qubits", "1"],
+                   capture_output=True, check=True, cwd=_REPO)
+    return time.perf_counter() - start
+
+
+def compare(results: dict, baseline: dict, max_slowdown: float) -> list:
+    """Return (name, ratio) for every case slower than ``max_slowdown`` x its baseline."""
+    regressions = []
+    for name, res in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base["seconds"]:
+            continue
+        ratio = res["seconds"] / base["seconds"]
+        flag = "REGRESSION" if ratio > max_slowdown else ""
+        print(f"{name:50s} {ratio:6.2f}x baseline {flag}")
+        if ratio > max_slowdown:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the BB84 simulator hot paths.")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (best is kept)")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast smoke run")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this string")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a JSON baseline")
+    parser.add_argument("--max-slowdown", type=float, default=1.25,
+                        help="fail when a case is slower than this multiple of its baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeat, args.quick, args.filter)
+    status = 0
+
+    if "cli_startup" in results:
+        from cli import STARTUP_BUDGET_S
+        if results["cli_startup"]["seconds"] > STARTUP_BUDGET_S:
+            print(f"cli_startup exceeds its {STARTUP_BUDGET_S:.2f} s budget")
+            status = 1
+
+    if args.save:
+        meta = {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        with open(args.save, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_slowdown)
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than {args.max_slowdown}x baseline")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
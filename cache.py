@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+# Default cache location, overridable with the BB84_CACHE environment variable
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "bb84", "results.sqlite")
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+
+def trial_key(params: Dict, seed_seq: np.random.SeedSequence, engine_version: int) -> str:
+    """Content address of one trial: its full parameter set, engine version and seed."""
+    record = {
+        "params": params,
+        "engine_version": engine_version,
+        "seed": [str(seed_seq.entropy), list(seed_seq.spawn_key), seed_seq.pool_size]
+    }
+    return hashlib.sha256(json.dumps(record, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """Persistent store of per-trial summaries with size-bounded LRU eviction.
+
+    Backed by SQLite in WAL mode, so several processes (parallel sweeps, CLI
+    runs) can read and write the same file. Each process opens its own
+    connection on first use, which also makes instances safe to pickle.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path or os.environ.get("BB84_CACHE") or DEFAULT_PATH
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._pid = None
+
+    def __getstate__(self):
+        return {"path": self.path, "max_bytes": self.max_bytes, "_conn": None, "_pid": None}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        """Return the cached summaries for ``keys`` (missing keys are left out)."""
+        keys = list(keys)
+        conn = self._connect()
+        found = {}
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = conn.execute(f"SELECT key, value FROM results WHERE key IN ({marks})", chunk).fetchall()
+            found.update((k, json.loads(v)) for k, v in rows)
+        if found:
+            now = time.time()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany("UPDATE results SET last_used = ? WHERE key = ?", ((now, k) for k in found))
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, Dict]]) -> None:
+        now = time.time()
+        rows = []
+        for key, value in items:
+            text = json.dumps(value)
+            rows.append((key, text, len(key) + len(text), now))
+        if not rows:
+            return
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", rows)
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        # Drop least recently used rows, one by one, until the stored payload fits in
+        # max_bytes; rows written or read at ``now`` (the current batch) are never dropped
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims = []
+        rows = conn.execute("SELECT rowid, size FROM results WHERE last_used < ? ORDER BY last_used, rowid", (now,))
+        for rowid, size in rows:
+            if excess <= 0:
+                break
+            victims.append((rowid,))
+            excess -= size
+        rows.close()
+        conn.executemany("DELETE FROM results WHERE rowid = ?", victims)
+
+    def stats(self) -> Dict:
+        entries, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {"path": self.path, "entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results")
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def get_cache(cache: Union[bool, str, ResultCache, None]) -> Optional[ResultCache]:
+    """Map the ``cache`` argument of the runners to a cache instance (or None)."""
+    if isinstance(cache, ResultCache):
+        return cache
+    if isinstance(cache, str):
+        return ResultCache(cache)
+    return ResultCache() if cache else None
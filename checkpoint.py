@@ -0,0 +1,76 @@
+"""On-disk checkpoints that let long batches and sweeps resume where they stopped.
+
+    batch_run_bb84(600, 0.3, 0.2, 10**6, seed=1, checkpoint="batch.ckpt")
+
+A checkpoint is one JSON file holding the run parameters, the seed and the
+progress made so far (completed cells, RNG state, partial aggregates). It is
+replaced atomically, so a crash or preemption mid-write leaves the previous
+version intact. Running the same call again with the same file skips the
+finished work and gives results identical to an uninterrupted run.
+"""
+import json
+import os
+import time
+from typing import Dict, Optional, Union
+
+from instrument import atomic_write
+
+FORMAT_VERSION = 1
+# Default seconds between periodic saves
+DEFAULT_INTERVAL = 30.0
+
+
+class CheckpointMismatch(ValueError):
+    """The checkpoint file was written by a run with different parameters."""
+
+
+class Checkpoint:
+    """A checkpoint file plus the policy for how often to rewrite it.
+
+    ``due()`` turns True every ``interval`` seconds; the runners then call
+    ``save`` with their current state. They always save once more when they
+    finish, are cancelled or fail.
+    """
+
+    def __init__(self, path: str, interval: float = DEFAULT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._last_save = time.monotonic()
+
+    def load(self, kind: str, params: Dict) -> Optional[Dict]:
+        """Return the saved state of a ``kind`` run with ``params``, or None if there is none.
+
+        Raises ``CheckpointMismatch`` if the file belongs to a different run.
+        """
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return None
+        if saved.get("format") != FORMAT_VERSION or saved.get("kind") != kind:
+            raise CheckpointMismatch(f"{self.path} is not a {kind} checkpoint")
+        if saved["params"] != json.loads(json.dumps(params)):
+            raise CheckpointMismatch(f"{self.path} was written for different parameters: {saved['params']}")
+        return saved
+
+    def due(self) -> bool:
+        return time.monotonic() - self._last_save >= self.interval
+
+    def save(self, kind: str, params: Dict, state: Dict) -> None:
+        record = {"format": FORMAT_VERSION, "kind": kind, "params": params, "saved_at": time.time(), **state}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        atomic_write(self.path, json.dumps(record))
+        self._last_save = time.monotonic()
+
+    def remove(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def get_checkpoint(checkpoint: Union[str, Checkpoint, None]) -> Optional[Checkpoint]:
+    """Map the ``checkpoint`` argument of the runners to a Checkpoint (or None)."""
+    if checkpoint is None or isinstance(checkpoint, Checkpoint):
+        return checkpoint
+    return Checkpoint(checkpoint)
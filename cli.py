@@ -0,0 +1,362 @@
+"""Headless command-line interface for the BB84 simulator.
+
+    python cli.py single --n-qubits 100000 --eve-prob 0.2
+    python cli.py batch --trials 1000 --workers 32 --format csv -o batch.csv
+    python cli.py sweep --points 21 --trials 50 --seed 1
+    python cli.py batch --trials 1000000 --checkpoint batch.ckpt   # Ctrl-C, then rerun to resume
+
+Only argparse and the standard library are imported at startup; the simulation
+modules are imported by the subcommand that needs them, so `--help` and the
+start of every run stay within STARTUP_BUDGET_S.
+"""
+import argparse
+import contextlib
+import csv
+import json
+import sys
+import time
+
+_T0 = time.perf_counter()
+
+# Seconds allowed from importing this module to the first simulation call
+# (bench.py also checks the whole `cli.py single` process against it)
+STARTUP_BUDGET_S = 1.0
+# Engines that simulate single runs; batch and sweep also sample with the vectorized stats and grid engines
+SIM_ENGINES = ("vectorized", "per_qubit")
+BATCH_ENGINES = SIM_ENGINES + ("stats", "grid")
+# Engines that only model the intercept-resend attack
+INTERCEPT_ONLY_ENGINES = ("per_qubit", "grid")
+
+
+def _flatten(row, prefix=""):
+    out = {}
+    for key, value in row.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            out.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (list, tuple)):
+            continue
+        else:
+            out[name] = value.item() if hasattr(value, "item") else value
+    return out
+
+
+class RowWriter:
+    """Streams flat result rows as JSON lines or CSV, flushing after every row.
+
+    ``path`` is opened (and truncated) on the first row, so commands that write
+    no rows leave it alone; ``"-"`` is stdout.
+    """
+
+    def __init__(self, path: str = "-", fmt: str = "jsonl"):
+        self.path = path
+        self.fmt = fmt
+        self.stream = None
+        self._csv = None
+
+    def write(self, row: dict) -> None:
+        if self.stream is None:
+            self.stream = sys.stdout if self.path == "-" else open(self.path, "w", newline="")
+        row = _flatten(row)
+        if self.fmt == "jsonl":
+            self.stream.write(json.dumps(row) + "\n")
+        else:
+            if self._csv is None:
+                self._csv = csv.DictWriter(self.stream, fieldnames=list(row), extrasaction="ignore")
+                self._csv.writeheader()
+            self._csv.writerow(row)
+        self.stream.flush()
+
+    def close(self) -> None:
+        if self.stream is not None and self.stream is not sys.stdout:
+            self.stream.close()
+
+
+def _startup_report(args) -> None:
+    elapsed = time.perf_counter() - _T0
+    if args.timing:
+        print(f"startup: {elapsed * 1e3:.1f} ms (budget {STARTUP_BUDGET_S * 1e3:.0f} ms)", file=sys.stderr)
+    if elapsed > STARTUP_BUDGET_S:
+        print(f"warning: startup took {elapsed:.2f} s, over the {STARTUP_BUDGET_S:.2f} s budget", file=sys.stderr)
+
+
+def cmd_single(args, writer: RowWriter) -> None:
+    import numpy as np
+    from BB84 import run_bb84
+    from channel import ChannelModel
+
+    _startup_report(args)
+    channel = None
+    if args.distance_km is not None:
+        channel = ChannelModel(args.distance_km, args.attenuation, args.detector_efficiency, args.dark_count_prob,
+                               args.depolarizing, args.pulse_rate)
+    kwargs = dict(n_qubits=args.n_qubits, eve_prob=args.eve_prob, eve_strategy=args.eve_strategy,
+                  channel_error_rate=args.channel_error_rate,
+                  test_fraction=args.test_fraction, rng=np.random.default_rng(args.seed), engine=args.engine,
+                  channel=channel, profile=args.profile)
+    if args.transcript:
+        from BB84 import simulate_bb84_stream
+        from transcript import TranscriptWriter
+
+        with TranscriptWriter(args.transcript, meta={"seed": args.seed}) as transcript:
+            for res in simulate_bb84_stream(events="block", block_size=1 << 20, **kwargs):
+                transcript.write(res)
+    else:
+        res = run_bb84(**kwargs)
+    row = dict(res["stats"])
+    if args.emit_key:
+        row["final_key_hex"] = res["final_key"].to_bytes().hex()
+    writer.write(row)
+
+
+@contextlib.contextmanager
+def _cancel_on_signals():
+    # SIGINT/SIGTERM set the yielded event, so runners stop cooperatively and
+    # still return (and checkpoint) their partial results; .signum records the signal
+    import signal
+    import threading
+
+    cancel = threading.Event()
+    cancel.signum = None
+
+    def handler(signum, frame):
+        cancel.signum = signum
+        cancel.set()
+
+    previous = {sig: signal.signal(sig, handler) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        yield cancel
+    finally:
+        for sig, old in previous.items():
+            signal.signal(sig, old)
+
+
+def _checkpoint(args):
+    if args.checkpoint is None:
+        return None
+    from checkpoint import Checkpoint
+    return Checkpoint(args.checkpoint, args.checkpoint_every)
+
+
+def _interrupted(args, cancel, res) -> int:
+    # Exit status for a run stopped by a signal (128 + signum, as a shell reports it)
+    if not res["cancelled"]:
+        return 0
+    hint = f"; rerun the same command to resume from {args.checkpoint}" if args.checkpoint else ""
+    print(f"interrupted{hint}", file=sys.stderr)
+    return 128 + (cancel.signum or 2)
+
+
+def cmd_batch(args, writer: RowWriter) -> int:
+    from runner import batch_run_bb84
+
+    _startup_report(args)
+    on_trial = (lambda trial, summary: writer.write({"trial": trial, **summary})) if args.per_trial else None
+    with _cancel_on_signals() as cancel:
+        res = batch_run_bb84(args.n_qubits, args.eve_prob, args.test_fraction, args.trials, workers=args.workers,
+                             seed=args.seed, engine=args.engine, profile=args.profile, on_trial=on_trial,
+                             cache=args.cache, memory_budget=int(args.memory_budget * 2**20),
+                             eve_strategy=args.eve_strategy, cancel=cancel, checkpoint=_checkpoint(args))
+    if args.per_trial:
+        # Keep the stream homogeneous: trial rows on the output, the aggregate on stderr
+        print(json.dumps(_flatten(res)), file=sys.stderr)
+    else:
+        writer.write(res)
+    return _interrupted(args, cancel, res)
+
+
+def cmd_sweep(args, writer: RowWriter) -> int:
+    import numpy as np
+    from runner import run_adaptive_sweep, run_sweep
+
+    _startup_report(args)
+    if args.adaptive:
+        if args.checkpoint:
+            print("--checkpoint is not supported with --adaptive; use --cache with --seed to resume", file=sys.stderr)
+            return 2
+        with _cancel_on_signals() as cancel:
+            res = run_adaptive_sweep(args.n_qubits, args.test_fraction, args.eve_min, args.eve_max,
+                                     initial_points=args.points, ci_width=args.ci_width,
+                                     max_trials=args.max_trials, workers=args.workers, seed=args.seed,
+                                     engine=args.engine, cancel=cancel, cache=args.cache,
+                                     eve_strategy=args.eve_strategy)
+        for point in res["results"]:
+            writer.write(point)
+        print(f"adaptive sweep: {res['cells']} trials over {res['points']} points in {res['wall_time']:.2f} s "
+              f"({res['fixed_grid_trials']} for the fixed grid, {res['cache_hits']} cached)", file=sys.stderr)
+        return _interrupted(args, cancel, res)
+    eve_probs = np.linspace(args.eve_min, args.eve_max, args.points)
+    with _cancel_on_signals() as cancel:
+        res = run_sweep(eve_probs, args.n_qubits, args.test_fraction, args.trials, workers=args.workers,
+                        seed=args.seed, engine=args.engine, cancel=cancel, profile=args.profile, cache=args.cache,
+                        memory_budget=int(args.memory_budget * 2**20), eve_strategy=args.eve_strategy,
+                        checkpoint=_checkpoint(args))
+    for point in res["results"]:
+        writer.write(point)
+    print(f"sweep: {res['cells']} trials ({res['cache_hits']} cached, {res['resumed_cells']} resumed) "
+          f"in {res['wall_time']:.2f} s", file=sys.stderr)
+    return _interrupted(args, cancel, res)
+
+
+def cmd_serve(args, writer: RowWriter) -> None:
+    import asyncio
+    import signal
+    import numpy as np
+    from kms import KeyManagementServer, parse_link
+
+    seeds = np.random.SeedSequence(args.seed).spawn(len(args.link))
+    links = [parse_link(spec, n_qubits=args.n_qubits, test_fraction=args.test_fraction, key_size=args.key_size,
+                        max_key_count=args.max_keys, seed=seed, engine=args.engine,
+                        eve_strategy=args.eve_strategy)
+             for spec, seed in zip(args.link, seeds)]
+    server = KeyManagementServer(links, args.host, args.port, wait_timeout=args.wait_timeout)
+
+    async def serve():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await server.start()
+        _startup_report(args)
+        print(f"serving {len(links)} link(s) on http://{server.host}:{server.port}/api/v1/", file=sys.stderr)
+        try:
+            await stop.wait()
+        finally:
+            await server.close()
+
+    asyncio.run(serve())
+    for link in server.metrics()["links"]:
+        writer.write(link)
+
+
+def cmd_export(args, writer: RowWriter) -> None:
+    from transcript import Transcript
+
+    if args.output == "-":
+        raise SystemExit("export needs -o/--output")
+    rows = Transcript(args.directory).to_csv(args.output, sifted_only=args.sifted_only)
+    print(f"export: {rows} rows written to {args.output}", file=sys.stderr)
+
+
+def cmd_validate(args, writer: RowWriter) -> int:
+    from analytic import validate
+
+    _startup_report(args)
+    res = validate(args.n_qubits, args.eve_prob, args.test_fraction, args.trials, engine=args.reference,
+                   seed=args.seed, alpha=args.alpha, eve_strategy=args.eve_strategy)
+    writer.write(res)
+    return 0 if res["passed"] else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from eve import STRATEGIES
+
+    parser = argparse.ArgumentParser(prog="bb84", description="Headless BB84 QKD simulator.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--n-qubits", type=int, default=600)
+    common.add_argument("--test-fraction", type=float, default=0.2)
+    common.add_argument("--seed", type=int, default=None)
+    common.add_argument("--eve-strategy", default="intercept_random", choices=tuple(STRATEGIES),
+                        help="Eve's attack")
+    common.add_argument("--profile", action="store_true", help="record per-stage timings and counters")
+    common.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    common.add_argument("-o", "--output", default="-", help="output file, '-' for stdout")
+    common.add_argument("--timing", action="store_true", help="report startup time on stderr")
+
+    cached = argparse.ArgumentParser(add_help=False)
+    cached.add_argument("--cache", nargs="?", const=True, default=None, metavar="PATH",
+                        help="reuse cached trial results (needs --seed); PATH defaults to $BB84_CACHE "
+                             "or ~/.cache/bb84/results.sqlite")
+    cached.add_argument("--memory-budget", type=float, default=64, metavar="MIB",
+                        help="working memory of one --engine grid tile, in MiB")
+    cached.add_argument("--checkpoint", metavar="PATH",
+                        help="save progress to PATH and resume from it when it exists (not with --adaptive)")
+    cached.add_argument("--checkpoint-every", type=float, default=30.0, metavar="SECONDS",
+                        help="seconds between checkpoint saves (one is always written on exit)")
+
+    p = sub.add_parser("single", parents=[common], help="run one trial")
+    p.add_argument("--engine", default="vectorized", choices=SIM_ENGINES, help="simulation engine")
+    p.add_argument("--eve-prob", type=float, default=0.0)
+    p.add_argument("--emit-key", action="store_true", help="include the final key as hex")
+    p.add_argument("--transcript", metavar="DIR", help="record every qubit as memory-mapped .npy columns in DIR")
+    p.add_argument("--channel-error-rate", type=float, default=0.0, help="bit-flip probability on Bob's outcomes")
+    p.add_argument("--distance-km", type=float, default=None,
+                   help="enable the lossy channel model; --n-qubits then counts pulses")
+    p.add_argument("--attenuation", type=float, default=0.2, help="fiber loss in dB/km")
+    p.add_argument("--detector-efficiency", type=float, default=1.0)
+    p.add_argument("--dark-count-prob", type=float, default=0.0, help="dark count probability per gate")
+    p.add_argument("--depolarizing", type=float, default=0.0)
+    p.add_argument("--pulse-rate", type=float, default=1e9, help="pulses per second, for the key rates")
+    p.set_defaults(func=cmd_single)
+
+    p = sub.add_parser("batch", parents=[common, cached], help="run many trials at one Eve probability")
+    p.add_argument("--engine", default="vectorized", choices=BATCH_ENGINES,
+                   help="simulation engine; stats and grid are vectorized over trials in-process")
+    p.add_argument("--eve-prob", type=float, default=0.0)
+    p.add_argument("--trials", type=int, default=50)
+    p.add_argument("--workers", type=int, default=None, help="worker processes (default: all CPUs)")
+    p.add_argument("--per-trial", action="store_true",
+                   help="stream one row per trial (the aggregate then goes to stderr)")
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("sweep", parents=[common, cached], help="sweep the Eve interception probability")
+    p.add_argument("--engine", default="vectorized", choices=BATCH_ENGINES,
+                   help="simulation engine; stats and grid are vectorized over trials in-process")
+    p.add_argument("--eve-min", type=float, default=0.0)
+    p.add_argument("--eve-max", type=float, default=1.0)
+    p.add_argument("--points", type=int, default=21, help="grid points (initial points with --adaptive)")
+    p.add_argument("--trials", type=int, default=5)
+    p.add_argument("--adaptive", action="store_true",
+                   help="add trials and points until the error-rate CI meets --ci-width")
+    p.add_argument("--ci-width", type=float, default=0.02, help="target 95%% CI width of the mean error rate")
+    p.add_argument("--max-trials", type=int, default=256, help="per-point trial cap with --adaptive")
+    p.add_argument("--workers", type=int, default=None, help="worker processes (default: all CPUs)")
+    p.set_defaults(func=cmd_sweep)
+
+    p = sub.add_parser("serve", parents=[common], help="serve simulated keys over the QKD 014 REST API")
+    p.add_argument("--engine", default="vectorized", choices=SIM_ENGINES, help="simulation engine")
+    p.add_argument("--link", action="append", required=True, metavar="MASTER:SLAVE[:EVE_PROB]",
+                   help="an Alice-Bob link to simulate (repeatable)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8014)
+    p.add_argument("--key-size", type=int, default=256, help="bits per delivered key")
+    p.add_argument("--max-keys", type=int, default=1024, help="keys buffered per link")
+    p.add_argument("--wait-timeout", type=float, default=5.0,
+                   help="seconds a request waits for an empty buffer to refill")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("export", help="convert a transcript directory to CSV")
+    p.add_argument("directory")
+    p.add_argument("-o", "--output", default="-", help="CSV file to write")
+    p.add_argument("--sifted-only", action="store_true", help="only rows where the bases match")
+    p.add_argument("--format", default="csv", help=argparse.SUPPRESS)
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("validate", parents=[common], help="check the stats engine against a simulated engine")
+    p.add_argument("--eve-prob", type=float, default=0.5)
+    p.add_argument("--trials", type=int, default=400)
+    p.add_argument("--reference", default="per_qubit", choices=SIM_ENGINES, help="engine to compare against")
+    p.add_argument("--alpha", type=float, default=0.01, help="fail when any p-value is below this")
+    p.set_defaults(func=cmd_validate)
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    flag = "--reference" if args.command == "validate" else "--engine"
+    engine = getattr(args, flag[2:], None)
+    if engine in INTERCEPT_ONLY_ENGINES and getattr(args, "eve_strategy", "intercept_random") != "intercept_random":
+        parser.error(f"{flag} {engine} only supports --eve-strategy intercept_random")
+    writer = RowWriter(args.output, args.format)
+    try:
+        status = args.func(args, writer)
+    finally:
+        writer.close()
+    return status or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
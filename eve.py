@@ -0,0 +1,141 @@
+"""Eve's attack strategies as batched array operations.
+
+Every strategy acts on the qubits Eve intercepts (chosen with ``eve_prob``) and
+returns Eve's guess of Alice's bit after the bases are announced, together
+with her Shannon information about that bit. Bases are coded 0 = Z, 1 = X.
+"""
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+# Eve's error on a Breidbart-basis measurement, and Bob's error on her resent state
+BREIDBART_ERROR = float(np.sin(np.pi / 8) ** 2)
+# Bob's error after the symmetric phase-covariant cloner; Eve's clone has the same fidelity
+CLONING_DISTURBANCE = (1 - 1 / np.sqrt(2)) / 2
+
+
+def binary_entropy(p: np.ndarray) -> np.ndarray:
+    p = np.clip(np.asarray(p, dtype=np.float64), 1e-12, 1 - 1e-12)
+    return -p * np.log2(p) - (1 - p) * np.log2(1 - p)
+
+
+class EveStrategy:
+    """An individual attack on the intercepted qubits.
+
+    ``intercept`` returns Eve's bits, her information per bit and the Z/X
+    states she resends, which Bob measures through the backend. Strategies
+    that resend other states also override ``measure`` to give Bob's outcomes
+    directly. ``induced_qber`` is the error rate on a sifted intercepted bit and
+    ``uses_backend`` tells whether ``intercept`` measures through the backend.
+    """
+
+    name = "base"
+    induced_qber = 0.25
+    uses_backend = False
+
+    def intercept(self, alice_bits, alice_bases, rng, backend) -> Tuple[np.ndarray, np.ndarray, np.ndarray,
+                                                                          np.ndarray]:
+        raise NotImplementedError
+
+    def measure(self, alice_bits, alice_bases, eve_bits, bob_bases, rng) -> Optional[np.ndarray]:
+        """Bob's outcomes on the intercepted qubits, or None to use the resent states."""
+        return None
+
+
+class InterceptResend(EveStrategy):
+    """Measure in a random Z/X basis and resend the result in that basis."""
+
+    name = "intercept_random"
+    uses_backend = True
+
+    def intercept(self, alice_bits, alice_bases, rng, backend):
+        eve_bases = rng.integers(0, 2, size=len(alice_bits), dtype=np.uint8)
+        eve_bits = backend.measure_batch(alice_bits, alice_bases, eve_bases, rng)
+        # A basis match reveals the bit; otherwise Eve's result is independent of it
+        info = (eve_bases == alice_bases).astype(np.float32)
+        return eve_bits, info, eve_bits, eve_bases
+
+
+class Breidbart(EveStrategy):
+    """Measure in the Breidbart basis halfway between Z and X and resend that state.
+
+    Eve guesses either basis's bit with probability cos^2(pi/8); Bob, in any
+    basis, reads her bit with the same probability.
+    """
+
+    name = "breidbart"
+
+    def intercept(self, alice_bits, alice_bases, rng, backend):
+        eve_bits = alice_bits ^ (rng.random(len(alice_bits)) < BREIDBART_ERROR).astype(np.uint8)
+        info = np.full(len(alice_bits), 1 - binary_entropy(BREIDBART_ERROR), dtype=np.float32)
+        return eve_bits, info, alice_bits, alice_bases
+
+    def measure(self, alice_bits, alice_bases, eve_bits, bob_bases, rng):
+        return eve_bits ^ (rng.random(len(eve_bits)) < BREIDBART_ERROR).astype(np.uint8)
+
+
+class PhaseCovariantCloning(EveStrategy):
+    """Keep an optimal phase-covariant clone and measure it once the bases are public.
+
+    Bob's copy is wrong with probability ``disturbance`` in Alice's basis and
+    random in the other; Eve's clone gives the right bit with probability
+    1/2 + sqrt(D (1 - D)).
+    """
+
+    name = "cloning"
+
+    def __init__(self, disturbance: float = CLONING_DISTURBANCE):
+        self.disturbance = disturbance
+        self.induced_qber = disturbance
+
+    @property
+    def eve_error(self) -> float:
+        return 0.5 - float(np.sqrt(self.disturbance * (1 - self.disturbance)))
+
+    def intercept(self, alice_bits, alice_bases, rng, backend):
+        eve_bits = alice_bits ^ (rng.random(len(alice_bits)) < self.eve_error).astype(np.uint8)
+        info = np.full(len(alice_bits), 1 - binary_entropy(self.eve_error), dtype=np.float32)
+        return eve_bits, info, alice_bits, alice_bases
+
+    def measure(self, alice_bits, alice_bases, eve_bits, bob_bases, rng):
+        flips = (rng.random(len(alice_bits)) < self.disturbance).astype(np.uint8)
+        coins = rng.integers(0, 2, size=len(alice_bits), dtype=np.uint8)
+        return np.where(bob_bases == alice_bases, alice_bits ^ flips, coins)
+
+
+STRATEGIES = {
+    InterceptResend.name: InterceptResend,
+    Breidbart.name: Breidbart,
+    PhaseCovariantCloning.name: PhaseCovariantCloning,
+}
+
+
+def get_strategy(strategy, **kwargs) -> EveStrategy:
+    """Return a strategy instance from a name in STRATEGIES or pass an instance through."""
+    if isinstance(strategy, EveStrategy):
+        return strategy
+    try:
+        return STRATEGIES[strategy](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown Eve strategy: {strategy!r}") from None
+
+
+def eve_key_stats(alice_bits: np.ndarray, same_basis_mask: np.ndarray, remaining_mask: np.ndarray,
+                  eve_mask: np.ndarray, eve_bits: np.ndarray, eve_info: np.ndarray) -> Dict:
+    """Eve's knowledge of the key left after parameter estimation (before privacy amplification).
+
+    ``remaining_mask`` selects the non-test bits among the sifted ones. Returns
+    how many of those Eve intercepted, how many of her bits match Alice's and
+    her Shannon information in bits, also as a fraction of the key length.
+    """
+    keep = remaining_mask.copy()
+    key_len = int(keep.sum())
+    keep &= eve_mask[same_basis_mask]
+    eve_sifted = eve_bits[same_basis_mask][keep]
+    matches = int(np.count_nonzero(eve_sifted == alice_bits[same_basis_mask][keep]))
+    info = float(eve_info[same_basis_mask][keep].sum(dtype=np.float64))
+    return {
+        "eve_key_bits": int(keep.sum()),
+        "eve_key_matches": matches,
+        "eve_information_bits": info,
+        "eve_information_rate": info / key_len if key_len else 0.0
+    }
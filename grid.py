@@ -0,0 +1,129 @@
+"""Whole sweeps simulated as (eve_prob x trial x qubit) array operations.
+
+    table = simulate_grid(np.linspace(0, 1, 21), n_qubits=1000, trials=100, seed=0)
+    table[table["eve_prob"] == 0.5]["observed_error_rate"]
+
+The grid is cut into tiles over points, trials and qubits that fit in
+``memory_budget`` bytes. Each tile is simulated with the same intercept-resend
+model as the vectorized engine, reduced to per-trial sifted lengths and error
+counts, and then post-processed like ``reconciliation="estimate"``.
+"""
+import numpy as np
+from typing import Iterator, Sequence, Tuple
+from analytic import trial_outcomes
+
+# One row per (eve_prob, trial) cell of the grid
+GRID_TRIAL_DTYPE = np.dtype([
+    ("eve_prob", np.float64),
+    ("trial", np.int64),
+    ("sift_len", np.int64),
+    ("sift_errors", np.int64),
+    ("sift_rate", np.float64),
+    ("test_size", np.int64),
+    ("test_errors", np.int64),
+    ("observed_error_rate", np.float64),
+    ("aborted", np.bool_),
+    ("leaked_bits_ec", np.int64),
+    ("final_key_len", np.int64),
+])
+DEFAULT_MEMORY_BUDGET = 64 * 2**20
+# Working set per simulated qubit: random byte, float32 Eve draw and uint8 temporaries
+_BYTES_PER_QUBIT = 16
+
+
+def grid_tiles(n_points: int, trials: int, n_qubits: int,
+               memory_budget: int = DEFAULT_MEMORY_BUDGET) -> Tuple[int, int, int]:
+    """Tile shape (points, trials, qubits) whose working set fits in ``memory_budget``.
+
+    Qubits are tiled first, then trials, then points, so a tile only spans
+    several trials once it holds whole trials.
+    """
+    elems = max(1, memory_budget // _BYTES_PER_QUBIT)
+    q = max(1, min(n_qubits, elems))
+    t = max(1, min(trials, elems // q))
+    p = max(1, min(n_points, elems // (q * t)))
+    return p, t, q
+
+
+def _count_tile(eve_probs: np.ndarray, trials: int, n_qubits: int, rng: np.random.Generator,
+                channel_error_rate: float) -> Tuple[np.ndarray, np.ndarray]:
+    # Sifted length and sifted errors per (point, trial) for one qubit tile
+    shape = (len(eve_probs), trials, n_qubits)
+    # Six independent bits per qubit from one random byte
+    r = rng.integers(0, 256, size=shape, dtype=np.uint8)
+    alice_bit = r & 1
+    alice_basis = (r >> 1) & 1
+    bob_basis = (r >> 2) & 1
+    eve_basis = (r >> 3) & 1
+    eve_guess = (r >> 4) & 1
+    bob_guess = (r >> 5) & 1
+    del r
+    eve = (rng.random(shape, dtype=np.float32) < eve_probs.astype(np.float32)[:, None, None]).view(np.uint8)
+
+    # Branch-free intercept-resend: a wrong basis measurement gives a random bit
+    eve_bit = alice_bit ^ ((eve_basis ^ alice_basis) & (eve_guess ^ alice_bit))
+    sent_bit = alice_bit ^ (eve & (eve_bit ^ alice_bit))
+    sent_basis = alice_basis ^ (eve & (eve_basis ^ alice_basis))
+    bob_bit = sent_bit ^ ((bob_basis ^ sent_basis) & (bob_guess ^ sent_bit))
+    if channel_error_rate > 0:
+        bob_bit ^= (rng.random(shape, dtype=np.float32) < channel_error_rate).view(np.uint8)
+
+    sifted = 1 ^ alice_basis ^ bob_basis
+    errors = sifted & (bob_bit ^ alice_bit)
+    return sifted.sum(axis=-1, dtype=np.int64), errors.sum(axis=-1, dtype=np.int64)
+
+
+def iter_grid(eve_probs: Sequence[float], n_qubits: int, trials: int, test_fraction: float = 0.2, seed=None,
+              memory_budget: int = DEFAULT_MEMORY_BUDGET, channel_error_rate: float = 0.0,
+              ec_efficiency: float = 1.15, privacy_amp_ratio: float = 0.5,
+              skip_tiles: int = 0) -> Iterator[np.ndarray]:
+    """Yield the rows of ``simulate_grid`` one (points, trials) tile at a time.
+
+    Rows come out in point-major, trial-minor order, so consumers can stop
+    between tiles (e.g. on cancellation) and keep everything yielded so far.
+    To resume, pass a Generator restored to its state after the last tile
+    consumed as ``seed`` and the number of tiles consumed as ``skip_tiles``.
+    """
+    eve_probs = np.asarray(eve_probs, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    p_tile, t_tile, q_tile = grid_tiles(len(eve_probs), trials, n_qubits, memory_budget)
+    tile = -1
+    for p0 in range(0, len(eve_probs), p_tile):
+        probs = eve_probs[p0:p0 + p_tile]
+        for t0 in range(0, trials, t_tile):
+            tile += 1
+            if tile < skip_tiles:
+                continue
+            n_trials = min(t_tile, trials - t0)
+            sift_len = np.zeros((len(probs), n_trials), dtype=np.int64)
+            sift_errors = np.zeros((len(probs), n_trials), dtype=np.int64)
+            for q0 in range(0, n_qubits, q_tile):
+                s, e = _count_tile(probs, n_trials, min(q_tile, n_qubits - q0), rng, channel_error_rate)
+                sift_len += s
+                sift_errors += e
+            out = trial_outcomes(n_qubits, sift_len, sift_errors, test_fraction, rng, ec_efficiency,
+                                 privacy_amp_ratio)
+
+            rows = np.empty(sift_len.size, dtype=GRID_TRIAL_DTYPE)
+            rows["eve_prob"] = np.repeat(probs, n_trials)
+            rows["trial"] = np.tile(np.arange(t0, t0 + n_trials), len(probs))
+            rows["sift_errors"] = sift_errors.ravel()
+            for name, values in out.items():
+                rows[name] = values.ravel()
+            yield rows
+
+
+def simulate_grid(eve_probs: Sequence[float], n_qubits: int, trials: int, test_fraction: float = 0.2, seed=None,
+                  memory_budget: int = DEFAULT_MEMORY_BUDGET, channel_error_rate: float = 0.0,
+                  ec_efficiency: float = 1.15, privacy_amp_ratio: float = 0.5) -> np.ndarray:
+    """Simulate ``trials`` runs at every Eve probability and return one row per trial.
+
+    The result is a ``GRID_TRIAL_DTYPE`` array of ``len(eve_probs) * trials``
+    rows ordered by point, then trial; ``observed_error_rate`` is NaN for
+    trials with nothing sifted. Output is deterministic for a given ``seed``
+    and ``memory_budget`` (the budget decides how random draws are tiled).
+    """
+    parts = list(iter_grid(eve_probs, n_qubits, trials, test_fraction, seed, memory_budget, channel_error_rate,
+                           ec_efficiency, privacy_amp_ratio))
+    return np.concatenate(parts) if parts else np.empty(0, dtype=GRID_TRIAL_DTYPE)
+
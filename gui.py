@@ -1,8 +1,13 @@
 import qnode
-from BB84 import simulate_bb84_stream
+from BB84 import run_bb84, simulate_bb84_stream
+from runner import SweepService
+from transcript import Transcript, TranscriptWriter
 
-import threading
+import queue
+import shutil
+import tempfile
 import time
+from contextlib import nullcontext
 import numpy as np
 import pandas as pd
 import tkinter as tk
@@ -24,10 +29,120 @@ def bit_basis_to_bloch_vector(bit, basis):
     else:
         return np.array([0, 0, 0])
 
+class BlochSphereView:
+    """Bloch sphere canvas that draws the sphere, axes and labels once.
+
+    Only the state-vector arrow is an animated artist, created once and moved by
+    replacing its line segments. After every full draw the static background is
+    cached, and vector updates restore it and blit the arrow when the canvas
+    supports blitting. ``set_vector`` only records the latest
+    vector; it is rendered at most ``max_fps`` times per second, so bursts of
+    updates collapse to a single frame.
+    """
+
+    ARROW_LENGTH_RATIO = 0.1
+    # Angle between each arrowhead line and the shaft, as drawn by Axes3D.quiver
+    ARROW_HEAD_ANGLE = np.radians(15)
+
+    def __init__(self, master, title, figsize=(3.5, 3.5), max_fps=20):
+        self.fig = Figure(figsize=figsize)
+        self.ax = self.fig.add_subplot(111, projection='3d')
+        self.canvas = FigureCanvasTkAgg(self.fig, master=master)
+        self.widget = self.canvas.get_tk_widget()
+        self.interval_ms = int(1000 / max_fps)
+        self.vector = np.array([0, 0, 1])
+        self._pending = None
+        self._scheduled = False
+        self._background = None
+
+        self._draw_static(title)
+        self.arrow = self.ax.quiver(0, 0, 0, *self.vector, color='m', arrow_length_ratio=self.ARROW_LENGTH_RATIO,
+                                    linewidth=2, animated=True)
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.draw()
+
+    def _draw_static(self, title):
+        ax = self.ax
+        # Draw sphere surface
+        u = np.linspace(0, 2 * np.pi, 100)
+        v = np.linspace(0, np.pi, 100)
+        x = np.outer(np.cos(u), np.sin(v))
+        y = np.outer(np.sin(u), np.sin(v))
+        z = np.outer(np.ones(np.size(u)), np.cos(v))
+        ax.plot_surface(x, y, z, color='lightblue', alpha=0.3, edgecolor='gray')
+
+        # Draw axes
+        ax.quiver(0, 0, 0, 1, 0, 0, color='r', arrow_length_ratio=0.1)
+        ax.quiver(0, 0, 0, 0, 1, 0, color='g', arrow_length_ratio=0.1)
+        ax.quiver(0, 0, 0, 0, 0, 1, color='b', arrow_length_ratio=0.1)
+        ax.text(1.1, 0, 0, 'X', color='r')
+        ax.text(0, 1.1, 0, 'Y', color='g')
+        ax.text(0, 0, 1.1, 'Z', color='b')
+
+        ax.set_xlim([-1, 1])
+        ax.set_ylim([-1, 1])
+        ax.set_zlim([-1, 1])
+        ax.set_autoscale_on(False)
+        ax.set_box_aspect([1, 1, 1])  # equal aspect ratio
+        ax.set_title(title)
+        ax.axis('off')
+
+    def _arrow_segments(self, vec):
+        # Shaft and head lines of a quiver arrow from the origin to vec: the head
+        # lines are the shaft rotated by +-ARROW_HEAD_ANGLE about an axis
+        # perpendicular to it in the xy plane (Rodrigues' formula with k . vec = 0)
+        norm = np.hypot(vec[0], vec[1])
+        k = np.array([vec[1] / norm, -vec[0] / norm, 0.0]) if norm > 0 else np.array([0.0, 1.0, 0.0])
+        along, across = vec * np.cos(self.ARROW_HEAD_ANGLE), np.cross(k, vec) * np.sin(self.ARROW_HEAD_ANGLE)
+        origin = np.zeros(3)
+        return [np.array([vec, origin]),
+                np.array([vec, vec - self.ARROW_LENGTH_RATIO * (along + across)]),
+                np.array([vec, vec - self.ARROW_LENGTH_RATIO * (along - across)])]
+
+    def _on_draw(self, event):
+        # A full redraw (resize, first show) refreshes the cached background
+        if self.canvas.supports_blit:
+            self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.ax.draw_artist(self.arrow)
+
+    def set_vector(self, vec):
+        self._pending = np.asarray(vec, dtype=float)
+        if not self._scheduled:
+            self._scheduled = True
+            self.widget.after(self.interval_ms, self._flush)
+
+    def _flush(self):
+        self._scheduled = False
+        if self._pending is None:
+            return
+        self.vector, self._pending = self._pending, None
+        self.arrow.set_segments(self._arrow_segments(self.vector))
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self.ax.draw_artist(self.arrow)
+        self.canvas.blit(self.fig.bbox)
+
+def write_sifted_csv(path, key_a, key_b, chunk_bits=1 << 20):
+    """Write two sifted keys as alice_sifted,bob_sifted,match rows, one chunk at a time."""
+    for start in range(0, max(len(key_a), 1), chunk_bits):
+        a = key_a[start:start + chunk_bits].to_bits()
+        b = key_b[start:start + chunk_bits].to_bits()
+        df = pd.DataFrame({"alice_sifted": a, "bob_sifted": b, "match": a == b})
+        df.to_csv(path, index=False, mode="w" if start == 0 else "a", header=start == 0)
+
 class BB84App:
+    SWEEP_POLL_MS = 50
+    SWEEP_MAX_FPS = 5
+    BLOCH_SAMPLES = 100
+    # Seconds to wait for a cancelled sweep when the window is closed
+    CLOSE_TIMEOUT_S = 5.0
+
     def __init__(self, root):
         self.root = root
         root.title("BB84 Quantum Encryption")
+        root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Controls frame
         control = ttk.Frame(root, padding=8)
@@ -58,12 +173,27 @@ class BB84App:
         self.btn_sweep.grid(row=3, column=1, pady=6, sticky="w")
         self.btn_save = ttk.Button(control, text="Save Last Results CSV", command=self.save_csv)
         self.btn_save.grid(row=4, column=0, pady=6, sticky="w")
+        self.btn_cancel = ttk.Button(control, text="Cancel Sweep", command=self.cancel_sweep)
+        self.btn_cancel.grid(row=4, column=1, pady=6, sticky="w")
 
         ttk.Label(control, text="Trials per Eve point (for sweep):").grid(row=5, column=0, sticky="w")
         self.trials_var = tk.IntVar(value=5)
         self.entry_trials = ttk.Entry(control, textvariable=self.trials_var, width=10)
         self.entry_trials.grid(row=5, column=1, sticky="w", padx=6)
 
+        # Off by default: a transcript holds every qubit of the run in a temporary directory
+        self.transcript_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control, text="Record per-qubit transcript (single trial)",
+                        variable=self.transcript_var).grid(row=6, column=0, columnspan=2, sticky="w")
+
+        # Sweeps are unseeded unless a seed is given; the cache (see cache.py) needs one
+        ttk.Label(control, text="Sweep seed (blank = random):").grid(row=7, column=0, sticky="w")
+        self.sweep_seed_var = tk.StringVar(value="")
+        ttk.Entry(control, textvariable=self.sweep_seed_var, width=10).grid(row=7, column=1, sticky="w", padx=6)
+        self.sweep_cache_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control, text="Reuse cached sweep results (needs a seed)",
+                        variable=self.sweep_cache_var).grid(row=8, column=0, columnspan=2, sticky="w")
+
         ttk.Label(root, text="Trials (batch mode):").grid(row=3, column=0, sticky="w")
         entry_trials = ttk.Entry(root)
         entry_trials.insert(0, "50")
@@ -95,27 +225,26 @@ class BB84App:
         self.canvas = FigureCanvasTkAgg(self.fig, master=plot_fr)
         self.canvas.get_tk_widget().pack()
 
-        # internal storage for last sweep results
+        # internal storage for last sweep results / last single-trial sifted keys or transcript
         self.last_df = None
+        self.last_keys = None
+        self.last_transcript = None
 
-        # Lock for thread safety
-        self._run_lock = threading.Lock()
+        # Background sweep and the partial per-point aggregates received from it
+        self._sweep = None
+        self._sweep_points = {}
+        self._sweep_dirty = False
+        self._last_sweep_draw = 0.0
 
 
         bloch_frame = ttk.Frame(root, padding=8)
         bloch_frame.grid(row=1, column=1, sticky="nsew")
 
-        # Figure for Alice
-        self.bloch_fig_alice = Figure(figsize=(3.5, 3.5))
-        self.bloch_ax_alice = self.bloch_fig_alice.add_subplot(111, projection='3d')
-        self.bloch_canvas_alice = FigureCanvasTkAgg(self.bloch_fig_alice, master=bloch_frame)
-        self.bloch_canvas_alice.get_tk_widget().pack(side='left', fill='both', expand=True)
-
-        # Figure for Bob
-        self.bloch_fig_bob = Figure(figsize=(3.5, 3.5))
-        self.bloch_ax_bob = self.bloch_fig_bob.add_subplot(111, projection='3d')
-        self.bloch_canvas_bob = FigureCanvasTkAgg(self.bloch_fig_bob, master=bloch_frame)
-        self.bloch_canvas_bob.get_tk_widget().pack(side='right', fill='both', expand=True)
+        # Bloch spheres: static parts drawn once, only the state vector is redrawn
+        self.bloch_alice = BlochSphereView(bloch_frame, "Alice's Qubit")
+        self.bloch_alice.widget.pack(side='left', fill='both', expand=True)
+        self.bloch_bob = BlochSphereView(bloch_frame, "Bob's Qubit")
+        self.bloch_bob.widget.pack(side='right', fill='both', expand=True)
 
         # Keep current vectors for animation
         self.current_bloch_vector_alice = np.array([0,0,1])
@@ -138,15 +267,26 @@ class BB84App:
         self.log(f"Running single BB84 trial: nq={nq}, eve_prob={eve_p:.3f}, test_frac={tf:.3f}")
         start = time.time()
 
-        # create generator
-        gen = simulate_bb84_stream(n_qubits=nq, eve_prob=eve_p, test_fraction=tf)
+        # Qubits arrive in blocks; the first qubit of each block drives the Bloch
+        # spheres and, if enabled, every qubit goes to an on-disk transcript
+        self._discard_transcript()
+        gen = simulate_bb84_stream(n_qubits=nq, eve_prob=eve_p, test_fraction=tf,
+                                   events="block", block_size=max(1, nq // self.BLOCH_SAMPLES), profile=True)
         res = None
-        for data in gen:
-            # you can optionally update Bloch sphere here per qubit:
-            if not data.get("final", False):
-                self.update_bloch_vector(data['alice_bit'], data['alice_basis'], data['bob_bit'], data['bob_basis'])
-            else:
-                res = data
+        directory = tempfile.mkdtemp(prefix="bb84-transcript-") if self.transcript_var.get() else None
+        writer = TranscriptWriter(directory, meta={"n_qubits": nq, "eve_prob": eve_p, "test_fraction": tf}) \
+            if directory else None
+        with writer if writer is not None else nullcontext():
+            for data in gen:
+                if writer is not None:
+                    writer.write(data)
+                if isinstance(data, np.ndarray):
+                    q = data[0]
+                    self.update_bloch_vector(q['alice_bit'], q['alice_basis'], q['bob_bit'], q['bob_basis'])
+                else:
+                    res = data
+        if directory:
+            self.last_transcript = Transcript(directory)
 
         t = time.time() - start
 
@@ -157,50 +297,25 @@ class BB84App:
         # Use final dict result
         self.log(f"Observed error rate (on test subset): {res['observed_error_rate']:.4f}")
         self.log(f"Sift rate: {res['sift_rate']:.4f}  (sifted bits = {len(res['sifted_A'])})")
+        st = res["stats"]
+        if st["eve_key_bits"]:
+            self.log(f"Eve: {st['eve_key_matches']}/{st['eve_key_bits']} intercepted key bits correct, "
+                     f"{st['eve_information_rate']:.3f} bits of information per key bit")
         pairs = list(zip(res['sifted_A'][:40], res['sifted_B'][:40]))
         self.log("First sifted bit pairs (Alice,Bob):", pairs)
+        stages = ", ".join(f"{name}={sec * 1e3:.1f}ms" for name, sec in res["stats"]["timings"].items())
+        self.log(f"Stage times: {stages}")
         self.log(f"Time: {t:.3f} s\n")
 
-        # store in last_df for possible save
-        df = pd.DataFrame({
-            "alice_sifted": res["sifted_A"],
-            "bob_sifted": res["sifted_B"]
-        })
-        df["match"] = df["alice_sifted"] == df["bob_sifted"]
-        self.last_df = df
-
-    def draw_bloch_sphere(self, ax, vec, title=""):
-        ax.clear()
-
-        # Draw sphere surface
-        u = np.linspace(0, 2 * np.pi, 100)
-        v = np.linspace(0, np.pi, 100)
-        x = np.outer(np.cos(u), np.sin(v))
-        y = np.outer(np.sin(u), np.sin(v))
-        z = np.outer(np.ones(np.size(u)), np.cos(v))
-        ax.plot_surface(x, y, z, color='lightblue', alpha=0.3, edgecolor='gray')
-
-        # Draw axes
-        ax.quiver(0, 0, 0, 1, 0, 0, color='r', arrow_length_ratio=0.1)
-        ax.quiver(0, 0, 0, 0, 1, 0, color='g', arrow_length_ratio=0.1)
-        ax.quiver(0, 0, 0, 0, 0, 1, color='b', arrow_length_ratio=0.1)
-        ax.text(1.1, 0, 0, 'X', color='r')
-        ax.text(0, 1.1, 0, 'Y', color='g')
-        ax.text(0, 0, 1.1, 'Z', color='b')
-
-        # Use passed vector
-        vec = np.array(vec)
-
-        # Draw qubit state vector
-        ax.quiver(0, 0, 0, vec[0], vec[1], vec[2], color='m', arrow_length_ratio=0.1, linewidth=2)
-
-        ax.set_xlim([-1, 1])
-        ax.set_ylim([-1, 1])
-        ax.set_zlim([-1, 1])
-        ax.set_box_aspect([1, 1, 1])  # equal aspect ratio
-        ax.set_title(title)
-        ax.axis('off')
+        # keep the packed sifted keys for possible save
+        self.last_df = None
+        self.last_keys = (res["sifted_A"], res["sifted_B"])
 
+    def _discard_transcript(self):
+        if self.last_transcript is not None:
+            shutil.rmtree(self.last_transcript.directory, ignore_errors=True)
+            self.last_transcript = None
+        self.last_keys = None
 
     def animate_bloch(self):
         if not self.animating:
@@ -217,110 +332,122 @@ class BB84App:
         x, y, z = self.current_bloch_vector_bob
         self.current_bloch_vector_bob = np.array([c*x - s*y, s*x + c*y, z])
 
-        # Draw Alice Bloch sphere
-        self.draw_bloch_sphere(self.bloch_ax_alice, self.current_bloch_vector_alice, title="Alice's Qubit")
-
-        # Draw Bob Bloch sphere
-        self.draw_bloch_sphere(self.bloch_ax_bob, self.current_bloch_vector_bob, title="Bob's Qubit")
-
-        # Update both canvases
-        self.bloch_canvas_alice.draw()
-        self.bloch_canvas_bob.draw()
+        # Only the state vectors are redrawn (blitted where supported)
+        self.bloch_alice.set_vector(self.current_bloch_vector_alice)
+        self.bloch_bob.set_vector(self.current_bloch_vector_bob)
 
         self.root.after(100, self.animate_bloch)
 
 
     def update_bloch_vector(self, alice_bit, alice_basis, bob_bit=None, bob_basis=None):
         self.current_bloch_vector_alice = bit_basis_to_bloch_vector(alice_bit, alice_basis)
+        self.bloch_alice.set_vector(self.current_bloch_vector_alice)
         if bob_bit is not None and bob_basis is not None:
             self.current_bloch_vector_bob = bit_basis_to_bloch_vector(bob_bit, bob_basis)
+            self.bloch_bob.set_vector(self.current_bloch_vector_bob)
 
 
     def run_sweep_thread(self):
-        if self._run_lock.locked():
+        if self._sweep is not None and self._sweep.running():
             messagebox.showinfo("Busy", "A sweep is already running.")
             return
 
+        try:
+            nq = int(self.n_qubits_var.get())
+            tf = float(self.test_fraction_var.get())
+            trials = int(self.trials_var.get())
+            seed_text = self.sweep_seed_var.get().strip()
+            seed = int(seed_text) if seed_text else None
+        except Exception as e:
+            messagebox.showerror("Input error", str(e))
+            return
+
+        cache = bool(self.sweep_cache_var.get())
+        if cache and seed is None:
+            self.log("Sweep cache needs a seed; running uncached.")
+            cache = False
+        self.log(f"Starting sweep: nq={nq}, test_frac={tf}, trials/point={trials}, seed={seed}")
+        eve_probs = np.linspace(0.0, 1.0, 21)
+        self._sweep_points = {}
+        self._sweep_dirty = False
+        self._last_sweep_draw = 0.0
+        self._reset_sweep_axes()
+        self.canvas.draw_idle()
+
         # Start animation
         self.animating = True
         self.animate_bloch()
 
-        def target():
-            self.run_sweep()
-            # Stop animation when done
-            self.animating = False
-
-        t = threading.Thread(target=target)
-        t.daemon = True
-        t.start()
-
-    def run_sweep(self):
-        with self._run_lock:
-            try:
-                nq = int(self.n_qubits_var.get())
-                tf = float(self.test_fraction_var.get())
-                trials = int(self.trials_var.get())
-            except Exception as e:
-                messagebox.showerror("Input error", str(e))
-                return
+        self._sweep = SweepService(eve_probs, nq, tf, trials, seed=seed, cache=cache or None).start()
+        self.root.after(self.SWEEP_POLL_MS, self._poll_sweep)
 
-            self.log(f"Starting sweep: nq={nq}, test_frac={tf}, trials/point={trials}")
-            eve_probs = np.linspace(0.0, 1.0, 21)
-            results = []
-
-            self.ax.clear()
-            self.ax.set_xlabel("Eve interception probability")
-            self.ax.set_ylabel("Observed error rate")
-            self.ax.set_ylim(0, 0.6)
-            self.ax.grid(True)
-
-            rng = np.random.default_rng()
-
-            for p in eve_probs:
-                errs = []
-                sifts = []
-
-                for _ in range(trials):
-                    # Use the streaming simulation generator
-                    gen = simulate_bb84_stream(n_qubits=nq, eve_prob=float(p), test_fraction=tf, rng=rng)
-                    for data in gen:
-                        if data.get("final"):
-                            if data["observed_error_rate"] is None:
-                                errs.append(0.0)
-                            else:
-                                errs.append(data["observed_error_rate"])
-                            sifts.append(data["sift_rate"])
-
-                            # Log final result of this trial
-                            self.log(f"Eve={p:.2f} trial {_+1} complete, error rate: {data['observed_error_rate']}")
-                        else:
-                            # Update Bloch vector live during qubit processing
-                            self.update_bloch_vector(data['alice_bit'], data['alice_basis'], data['bob_bit'], data['bob_basis'])
-
-                mean_err = float(np.mean(errs))
-                std_err = float(np.std(errs))
-                mean_sift = float(np.mean(sifts))
-                results.append((p, mean_err, std_err, mean_sift))
-
-                # Update plot progressively
-                xs = [r[0] for r in results]
-                ys = [r[1] for r in results]
-                yerr = [r[2] for r in results]
-                self.ax.clear()
-                self.ax.set_xlabel("Eve interception probability")
-                self.ax.set_ylabel("Observed error rate")
-                self.ax.set_ylim(0, 0.6)
-                self.ax.grid(True)
-                self.ax.errorbar(xs, ys, yerr=yerr, marker='o', linestyle='-')
-                self.canvas.draw()
-                self.root.update()
-                time.sleep(0.01)
-
-                self.log(f"Eve={p:.2f} -> mean_err={mean_err:.3f} std={std_err:.3f} mean_sift={mean_sift:.3f}")
-
-            df = pd.DataFrame(results, columns=["eve_prob", "mean_error_rate", "std_error_rate", "mean_sift_rate"])
-            self.last_df = df
-            self.log("Sweep complete.\n")
+    def cancel_sweep(self):
+        if self._sweep is not None and self._sweep.running():
+            self._sweep.cancel()
+            self.log("Cancelling sweep...")
+
+    def on_close(self):
+        # Stop a running sweep before the window goes; with the cache enabled its
+        # finished cells are stored, so the next sweep with the same seed resumes from them
+        if self._sweep is not None and self._sweep.running():
+            self._sweep.cancel()
+            self._sweep.join(self.CLOSE_TIMEOUT_S)
+        self.animating = False
+        self._discard_transcript()
+        self.root.destroy()
+
+    def _reset_sweep_axes(self):
+        self.ax.clear()
+        self.ax.set_xlabel("Eve interception probability")
+        self.ax.set_ylabel("Observed error rate")
+        self.ax.set_ylim(0, 0.6)
+        self.ax.grid(True)
+
+    def _draw_sweep(self):
+        results = [self._sweep_points[p] for p in sorted(self._sweep_points)]
+        self._reset_sweep_axes()
+        self.ax.errorbar([r["eve_prob"] for r in results], [r["mean_error"] for r in results],
+                         yerr=[r["std_error"] for r in results], marker='o', linestyle='-')
+        self.canvas.draw_idle()
+        self._sweep_dirty = False
+        self._last_sweep_draw = time.monotonic()
+
+    def _poll_sweep(self):
+        # Runs on the Tk main loop: drain worker progress, redraw at a bounded frame rate
+        finished = None
+        try:
+            while True:
+                kind, payload = self._sweep.queue.get_nowait()
+                if kind == "point":
+                    self._sweep_points[payload["eve_prob"]] = payload
+                    self._sweep_dirty = True
+                else:
+                    finished = (kind, payload)
+        except queue.Empty:
+            pass
+
+        if self._sweep_dirty and (finished or time.monotonic() - self._last_sweep_draw >= 1.0 / self.SWEEP_MAX_FPS):
+            self._draw_sweep()
+
+        if finished is None:
+            self.root.after(self.SWEEP_POLL_MS, self._poll_sweep)
+            return
+
+        self.animating = False
+        kind, payload = finished
+        if kind == "error":
+            self.log(f"Sweep failed: {payload}")
+            return
+        for r in payload["results"]:
+            self.log(f"Eve={r['eve_prob']:.2f} -> mean_err={r['mean_error']:.3f} std={r['std_error']:.3f} mean_sift={r['mean_sift']:.3f}")
+        self._discard_transcript()
+        self.last_df = pd.DataFrame(
+            [(r["eve_prob"], r["mean_error"], r["std_error"], r["mean_sift"]) for r in payload["results"]],
+            columns=["eve_prob", "mean_error_rate", "std_error_rate", "mean_sift_rate"]
+        )
+        status = "cancelled" if payload["cancelled"] else "complete"
+        self.log(f"Sweep {status}: {payload['cells']} trials ({payload['cache_hits']} cached) in {payload['wall_time']:.2f} s "
+                 f"({payload['trials_per_sec'] or 0:.1f} trials/s).\n")
 
 
     def run_simulation(self):
@@ -336,11 +463,7 @@ class BB84App:
                 f"[BATCH] Eve={eve_prob:.2f} | Mean Err={res['mean_error']:.4f} ± {res['std_error']:.4f} | Mean Sift={res['mean_sift']:.4f}"
             )
         else:
-            gen = simulate_bb84_stream(n_qubits, eve_prob, test_fraction)
-            res = None
-            for data in gen:
-                if data.get("final", False):
-                    res = data
+            res = run_bb84(n_qubits, eve_prob, test_fraction=test_fraction)
             if res is None:
                 messagebox.showerror("Error", "No final result from simulation.")
                 return
@@ -349,14 +472,19 @@ class BB84App:
             )
 
     def save_csv(self):
-        if self.last_df is None:
+        if self.last_df is None and self.last_keys is None:
             messagebox.showinfo("No data", "No results available to save. Run a trial or sweep first.")
             return
         path = filedialog.asksaveasfilename(defaultextension=".csv",
                                             filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
         if not path:
             return
-        self.last_df.to_csv(path, index=False)
+        if self.last_df is not None:
+            self.last_df.to_csv(path, index=False)
+        elif self.last_transcript is not None:
+            self.last_transcript.to_csv(path)
+        else:
+            write_sifted_csv(path, *self.last_keys)
         messagebox.showinfo("Saved", f"Saved CSV to {path}")
 
     
\ No newline at end of file
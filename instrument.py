@@ -0,0 +1,148 @@
+import json
+import os
+import tempfile
+import time
+from contextlib import nullcontext
+from typing import Dict, Union
+
+# Stages of one BB84 run, in pipeline order
+STAGES = (
+    "state_preparation",
+    "eve_interception",
+    "measurement",
+    "sifting",
+    "parameter_estimation",
+    "error_correction",
+    "privacy_amplification",
+)
+
+
+class _Stage:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StageTimer:
+    """Per-stage wall time and counters for one or more simulation runs."""
+
+    enabled = True
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def count_bytes(self, *arrays) -> None:
+        self.count("bytes_allocated", sum(a.nbytes for a in arrays))
+
+    def merge(self, other: Union["StageTimer", Dict]) -> None:
+        """Add another timer's (or its ``as_dict()``'s) totals into this one."""
+        if isinstance(other, StageTimer):
+            other = other.as_dict()
+        for name, seconds in other.get("timings", {}).items():
+            self.add_time(name, seconds)
+        for name, value in other.get("counters", {}).items():
+            self.count(name, value)
+
+    def as_dict(self) -> Dict:
+        return {"timings": dict(self.timings), "counters": dict(self.counters)}
+
+
+class _NullTimer:
+    """Stand-in used when instrumentation is off; every call is a no-op."""
+
+    enabled = False
+    _stage = nullcontext()
+
+    def stage(self, name):
+        return self._stage
+
+    def add_time(self, name, seconds):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def count_bytes(self, *arrays):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+def get_timer(profile: Union[bool, StageTimer, None]):
+    """Map the ``profile`` argument of the simulators to a timer instance."""
+    if isinstance(profile, StageTimer):
+        return profile
+    return StageTimer() if profile else NULL_TIMER
+
+
+def atomic_write(path: str, text: str) -> None:
+    """Replace ``path`` with ``text`` so readers see either the old or the new file, never a partial one."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_prometheus_textfile(path: str, metrics: Dict, prefix: str = "bb84") -> None:
+    """Write metrics in the Prometheus text format (e.g. for node_exporter's textfile collector)."""
+    lines = [f"# TYPE {prefix}_stage_seconds_total counter"]
+    for name, seconds in sorted(metrics.get("timings", {}).items()):
+        lines.append(f'{prefix}_stage_seconds_total{{stage="{name}"}} {seconds:.9f}')
+    for name, value in sorted(metrics.get("counters", {}).items()):
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        lines.append(f"{prefix}_{name}_total {value}")
+    for key in ("trials", "wall_time", "trials_per_sec"):
+        if metrics.get(key) is not None:
+            lines.append(f"# TYPE {prefix}_{key} gauge")
+            lines.append(f"{prefix}_{key} {metrics[key]}")
+    atomic_write(path, "\n".join(lines) + "\n")
+
+
+class JsonLinesExporter:
+    """Metrics hook that appends each metrics dict as one JSON line to ``path``."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __call__(self, metrics: Dict) -> None:
+        record = {"time": time.time(), **metrics}
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+
+class PrometheusExporter:
+    """Metrics hook that rewrites a Prometheus text file with the latest metrics."""
+
+    def __init__(self, path: str, prefix: str = "bb84"):
+        self.path = path
+        self.prefix = prefix
+
+    def __call__(self, metrics: Dict) -> None:
+        write_prometheus_textfile(self.path, metrics, self.prefix)
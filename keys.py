@@ -0,0 +1,141 @@
+import numpy as np
+from typing import Iterator, List, Optional, Union
+
+# Number of set bits for every byte value
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+class BitKey:
+    """Bit string packed eight bits per byte (np.packbits big-endian order).
+
+    ``data`` may be a view into another key's buffer, so bits past ``length``
+    in the last byte are not guaranteed to be zero; every operation masks them.
+    Slices that start on a byte boundary share memory with the parent key.
+    """
+
+    __slots__ = ("data", "length")
+
+    def __init__(self, data: np.ndarray, length: int):
+        self.data = data
+        self.length = int(length)
+
+    @classmethod
+    def from_bits(cls, bits) -> "BitKey":
+        bits = np.asarray(bits, dtype=np.uint8)
+        return cls(np.packbits(bits), len(bits))
+
+    @classmethod
+    def from_bytes(cls, raw: bytes, length: Optional[int] = None) -> "BitKey":
+        data = np.frombuffer(raw, dtype=np.uint8)
+        return cls(data, 8 * len(data) if length is None else length)
+
+    @classmethod
+    def empty(cls) -> "BitKey":
+        return cls(np.zeros(0, dtype=np.uint8), 0)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __repr__(self) -> str:
+        return f"BitKey(length={self.length})"
+
+    def _tail_mask(self) -> int:
+        rem = self.length % 8
+        return 0xFF if rem == 0 else (0xFF << (8 - rem)) & 0xFF
+
+    def packed(self) -> np.ndarray:
+        """Packed bytes of exactly this key, with padding bits cleared."""
+        data = self.data[:(self.length + 7) // 8]
+        if self.length % 8:
+            data = data.copy()
+            data[-1] &= self._tail_mask()
+        return data
+
+    def to_bits(self) -> np.ndarray:
+        return np.unpackbits(self.data, count=self.length)
+
+    def tolist(self) -> List[int]:
+        return self.to_bits().tolist()
+
+    def to_bytes(self) -> bytes:
+        return self.packed().tobytes()
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.tolist())
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.length)
+            if step != 1:
+                return BitKey.from_bits(self.to_bits()[key])
+            stop = max(start, stop)
+            if start % 8 == 0:
+                # Byte-aligned: share the underlying buffer
+                return BitKey(self.data[start // 8:(stop + 7) // 8], stop - start)
+            return BitKey.from_bits(np.unpackbits(self.data, count=stop)[start:])
+        if key < 0:
+            key += self.length
+        if not 0 <= key < self.length:
+            raise IndexError("BitKey index out of range")
+        return int((self.data[key // 8] >> (7 - key % 8)) & 1)
+
+    def take(self, indices) -> "BitKey":
+        """Gather the bits at ``indices`` into a new key."""
+        indices = np.asarray(indices, dtype=np.intp)
+        bits = (self.data[indices // 8] >> (7 - indices % 8).astype(np.uint8)) & 1
+        return BitKey.from_bits(bits)
+
+    def compress(self, mask) -> "BitKey":
+        """Keep the bits where the boolean ``mask`` is set."""
+        return self.take(np.flatnonzero(mask))
+
+    def count_ones(self) -> int:
+        if self.length == 0:
+            return 0
+        n_bytes = (self.length + 7) // 8
+        full = int(_POPCOUNT[self.data[:n_bytes - 1]].sum(dtype=np.int64))
+        return full + int(_POPCOUNT[self.data[n_bytes - 1] & self._tail_mask()])
+
+    def __xor__(self, other: "BitKey") -> "BitKey":
+        if len(other) != self.length:
+            raise ValueError("BitKey lengths differ")
+        n_bytes = (self.length + 7) // 8
+        return BitKey(np.bitwise_xor(self.data[:n_bytes], other.data[:n_bytes]), self.length)
+
+    def errors(self, other: "BitKey") -> int:
+        """Number of positions where the two keys differ."""
+        return (self ^ other).count_ones()
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, BitKey):
+            return NotImplemented
+        return self.length == other.length and np.array_equal(self.packed(), other.packed())
+
+    __hash__ = None
+
+
+class BitKeyBuilder:
+    """Appends bit chunks of any length into packed storage without re-packing."""
+
+    def __init__(self):
+        self._chunks = []
+        self._carry = np.zeros(0, dtype=np.uint8)
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def append(self, bits) -> None:
+        bits = np.asarray(bits, dtype=np.uint8)
+        self.length += len(bits)
+        if len(self._carry):
+            bits = np.concatenate((self._carry, bits))
+        aligned = len(bits) - len(bits) % 8
+        if aligned:
+            self._chunks.append(np.packbits(bits[:aligned]))
+        self._carry = bits[aligned:].copy()
+
+    def build(self) -> BitKey:
+        chunks = self._chunks + ([np.packbits(self._carry)] if len(self._carry) else [])
+        data = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.uint8)
+        return BitKey(data, self.length)
@@ -0,0 +1,449 @@
+"""Local key-management service serving simulated BB84 keys.
+
+Follows the REST shape of ETSI GS QKD 014 on plain HTTP/1.1 over localhost:
+
+    GET  /api/v1/keys/{slave_SAE_ID}/status
+    GET  /api/v1/keys/{slave_SAE_ID}/enc_keys?number=N&size=BITS   (or POST {"number", "size"})
+    GET  /api/v1/keys/{master_SAE_ID}/dec_keys?key_ID=ID            (or POST {"key_IDs": [{"key_ID"}]})
+    GET  /api/v1/metrics                                            (not part of the standard)
+
+Every link runs a background producer that repeats ``simulate_bb84_stream``
+in an executor and cuts the final keys into ``key_size``-bit keys in a bounded
+ring buffer. A full buffer pauses its producer; requests on an empty buffer
+wait up to ``wait_timeout`` seconds for keys before answering 503. Runs that
+yield no key are retried with backoff, and a link whose runs keep failing
+answers 503 at once with the cause.
+"""
+import asyncio
+import base64
+import json
+import logging
+import time
+import uuid
+import numpy as np
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from BB84 import simulate_bb84_stream
+
+# Request latencies kept per link for the percentile metrics
+LATENCY_WINDOW = 10_000
+MAX_KEYS_PER_REQUEST = 128
+# Producer backoff after runs that yield no usable key: BACKOFF_S doubling per
+# consecutive failure up to MAX_BACKOFF_S; after MAX_FAILED_RUNS in a row the
+# link reports an error until a run succeeds again
+BACKOFF_S = 0.05
+MAX_BACKOFF_S = 5.0
+MAX_FAILED_RUNS = 8
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+_log = logging.getLogger(__name__)
+
+
+class KeyRequestError(Exception):
+    """A key request that cannot be served; ``status`` is the HTTP status code."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _produce_key(n_qubits: int, eve_prob: float, test_fraction: float, seed_seq: np.random.SeedSequence,
+                 sim_kwargs: Dict) -> Tuple[bytes, Dict]:
+    # Runs in the executor: one full BB84 run, returning whole bytes of its final key and its stats
+    rng = np.random.default_rng(seed_seq)
+    for data in simulate_bb84_stream(n_qubits, eve_prob, test_fraction=test_fraction, rng=rng, events="none",
+                                     **sim_kwargs):
+        pass
+    key = data["final_key"]
+    return key[:len(key) - len(key) % 8].to_bytes(), data["stats"]
+
+
+class KeyRing:
+    """Fixed-capacity FIFO of equal-sized keys in one preallocated array."""
+
+    def __init__(self, capacity: int, key_bytes: int):
+        self._data = np.zeros((capacity, key_bytes), dtype=np.uint8)
+        self._head = 0
+        self._count = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def free(self) -> int:
+        return self.capacity - self._count
+
+    def put(self, keys: np.ndarray) -> int:
+        """Append up to ``free()`` rows of ``keys``; returns how many were stored."""
+        n = min(len(keys), self.free())
+        idx = (self._head + self._count + np.arange(n)) % self.capacity
+        self._data[idx] = keys[:n]
+        self._count += n
+        return n
+
+    def get(self, n: int) -> np.ndarray:
+        n = min(n, self._count)
+        idx = (self._head + np.arange(n)) % self.capacity
+        self._head = (self._head + n) % self.capacity
+        self._count -= n
+        return self._data[idx]
+
+
+class Link:
+    """One simulated Alice-Bob link: BB84 parameters, key buffer and metrics."""
+
+    def __init__(self, master_sae_id: str, slave_sae_id: str, n_qubits: int = 100_000, eve_prob: float = 0.0,
+                 test_fraction: float = 0.2, key_size: int = 256, max_key_count: int = 1024, seed=None,
+                 **sim_kwargs):
+        if key_size % 8:
+            raise ValueError("key_size must be a multiple of 8 bits")
+        self.master_sae_id = master_sae_id
+        self.slave_sae_id = slave_sae_id
+        self.n_qubits = n_qubits
+        self.eve_prob = eve_prob
+        self.test_fraction = test_fraction
+        self.key_size = key_size
+        self.sim_kwargs = sim_kwargs
+        self.ring = KeyRing(max_key_count, key_size // 8)
+        self.seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        # Keys handed to the master SAE, kept until the slave fetches them with dec_keys
+        self.delivered: "OrderedDict[str, bytes]" = OrderedDict()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.runs = 0
+        self.aborted_runs = 0
+        self.mismatched_runs = 0
+        self.bits_generated = 0
+        self.keys_delivered = 0
+        self.started = None
+        # Set when the producer task died or keeps failing; requests then fail instead of waiting for keys
+        self.error = None
+        self.failed_runs = 0
+        self._pending = b""
+        self._cond = None
+
+    @property
+    def max_key_per_request(self) -> int:
+        return min(MAX_KEYS_PER_REQUEST, self.ring.capacity)
+
+    def status(self, kme_id: str) -> Dict:
+        return {
+            "source_KME_ID": kme_id,
+            "target_KME_ID": kme_id,
+            "master_SAE_ID": self.master_sae_id,
+            "slave_SAE_ID": self.slave_sae_id,
+            "key_size": self.key_size,
+            "stored_key_count": len(self.ring),
+            "max_key_count": self.ring.capacity,
+            "max_key_per_request": self.max_key_per_request,
+            "max_key_size": self.key_size,
+            "min_key_size": self.key_size,
+            "max_SAE_ID_count": 0
+        }
+
+    def metrics(self) -> Dict:
+        elapsed = time.monotonic() - self.started if self.started is not None else 0.0
+        lat = np.array(self.latencies) * 1e3
+        return {
+            "master_SAE_ID": self.master_sae_id,
+            "slave_SAE_ID": self.slave_sae_id,
+            "stored_key_count": len(self.ring),
+            "runs": self.runs,
+            "aborted_runs": self.aborted_runs,
+            "mismatched_runs": self.mismatched_runs,
+            "failed_runs": self.failed_runs,
+            "error": self.error,
+            "bits_generated": self.bits_generated,
+            "generation_rate_bps": self.bits_generated / elapsed if elapsed > 0 else 0.0,
+            "keys_delivered": self.keys_delivered,
+            "latency_ms": {
+                "count": len(lat),
+                "p50": float(np.percentile(lat, 50)) if len(lat) else None,
+                "p90": float(np.percentile(lat, 90)) if len(lat) else None,
+                "p99": float(np.percentile(lat, 99)) if len(lat) else None,
+                "max": float(lat.max()) if len(lat) else None
+            }
+        }
+
+    async def produce(self, executor: Executor) -> None:
+        """Producer loop: simulate, split into keys, wait while the ring is full.
+
+        Runs that abort or end with mismatched keys are retried with exponential
+        backoff; ``MAX_FAILED_RUNS`` of them in a row set ``error``.
+        """
+        loop = asyncio.get_running_loop()
+        key_bytes = self.key_size // 8
+        while True:
+            async with self._cond:
+                while len(self._pending) >= key_bytes:
+                    await self._cond.wait_for(lambda: self.ring.free() > 0)
+                    whole = len(self._pending) // key_bytes
+                    keys = np.frombuffer(self._pending[:whole * key_bytes], dtype=np.uint8).reshape(whole, key_bytes)
+                    stored = self.ring.put(keys)
+                    self._pending = self._pending[stored * key_bytes:]
+                    self._cond.notify_all()
+                await self._cond.wait_for(lambda: self.ring.free() > 0)
+
+            raw, stats = await loop.run_in_executor(
+                executor, _produce_key, self.n_qubits, self.eve_prob, self.test_fraction,
+                self.seed_seq.spawn(1)[0], self.sim_kwargs
+            )
+            self.runs += 1
+            if stats["aborted"]:
+                self.aborted_runs += 1
+                cause = f"run aborted at observed error rate {stats['observed_error_rate']:.3f}"
+            elif stats["final_keys_match"] is False:
+                # Residual errors survived reconciliation; the two ends would not share this key
+                self.mismatched_runs += 1
+                cause = "final keys differed after reconciliation"
+            else:
+                cause = None
+            if cause is not None:
+                self.failed_runs += 1
+                if self.failed_runs >= MAX_FAILED_RUNS:
+                    self.error = f"{self.failed_runs} consecutive runs failed, last: {cause}"
+                await asyncio.sleep(min(MAX_BACKOFF_S, BACKOFF_S * 2 ** (self.failed_runs - 1)))
+                continue
+            if self.failed_runs >= MAX_FAILED_RUNS:
+                self.error = None
+            self.failed_runs = 0
+            self.bits_generated += 8 * len(raw)
+            self._pending += raw
+
+    async def take(self, number: int, timeout: float) -> List[Dict]:
+        """Remove ``number`` keys, waiting up to ``timeout`` s for the producer to refill."""
+        start = time.perf_counter()
+        if self.error is not None:
+            raise KeyRequestError(503, f"key producer failed: {self.error}")
+        async with self._cond:
+            try:
+                await asyncio.wait_for(self._cond.wait_for(lambda: len(self.ring) >= number), timeout)
+            except asyncio.TimeoutError:
+                raise KeyRequestError(503, f"only {len(self.ring)} keys available, {number} requested")
+            keys = self.ring.get(number)
+            self._cond.notify_all()
+
+        out = []
+        for row in keys:
+            key_id = str(uuid.uuid4())
+            raw = row.tobytes()
+            self.delivered[key_id] = raw
+            out.append({"key_ID": key_id, "key": base64.b64encode(raw).decode()})
+        while len(self.delivered) > 4 * self.ring.capacity:
+            self.delivered.popitem(last=False)
+        self.keys_delivered += len(out)
+        self.latencies.append(time.perf_counter() - start)
+        return out
+
+
+def _int_param(name: str, value) -> int:
+    # An integer request parameter, from the query string or the JSON body
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise KeyRequestError(400, f"{name} must be an integer")
+    try:
+        return int(value)
+    except ValueError:
+        raise KeyRequestError(400, f"{name} must be an integer") from None
+
+
+def _key_ids(items) -> List[str]:
+    # key_ID strings of a dec_keys body's "key_IDs" list
+    if not isinstance(items, list) or not all(isinstance(k, dict) and isinstance(k.get("key_ID"), str)
+                                              for k in items):
+        raise KeyRequestError(400, 'key_IDs must be a list of {"key_ID": ...} objects')
+    return [k["key_ID"] for k in items]
+
+
+def _fetch(links: Sequence[Link], key_ids: Sequence[str]) -> List[Dict]:
+    # Keys delivered to a master SAE on any of its links, removed once fetched
+    owners = {}
+    for key_id in key_ids:
+        owners[key_id] = next((link for link in links if key_id in link.delivered), None)
+    missing = [k for k, link in owners.items() if link is None]
+    if missing:
+        raise KeyRequestError(400, f"unknown key_ID(s): {', '.join(missing)}")
+    return [{"key_ID": k, "key": base64.b64encode(owners[k].delivered.pop(k)).decode()} for k in key_ids]
+
+
+class KeyManagementServer:
+    """asyncio HTTP server exposing ``links`` through the QKD 014 key-delivery API.
+
+    ``executor`` runs the simulations; the default thread pool has one worker
+    per link. Use ``port=0`` to bind an ephemeral port (see ``port`` after start).
+    """
+
+    def __init__(self, links: Sequence[Link], host: str = "127.0.0.1", port: int = 0, kme_id: str = "KME_1",
+                 executor: Optional[Executor] = None, wait_timeout: float = 5.0):
+        self.links = {link.slave_sae_id: link for link in links}
+        self.masters: Dict[str, List[Link]] = {}
+        for link in links:
+            self.masters.setdefault(link.master_sae_id, []).append(link)
+        self.host = host
+        self.port = port
+        self.kme_id = kme_id
+        self.wait_timeout = wait_timeout
+        self._executor = executor or ThreadPoolExecutor(max_workers=max(1, len(links)))
+        self._own_executor = executor is None
+        self._server = None
+        self._producers = []
+
+    async def start(self) -> "KeyManagementServer":
+        for link in self.links.values():
+            link._cond = asyncio.Condition()
+            link.started = time.monotonic()
+            task = asyncio.create_task(link.produce(self._executor))
+            task.add_done_callback(lambda t, link=link: self._producer_done(link, t))
+            self._producers.append(task)
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    @staticmethod
+    def _producer_done(link: Link, task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is None:
+            return
+        exc = task.exception()
+        link.error = f"{type(exc).__name__}: {exc}"
+        _log.error("key producer for %s -> %s failed", link.master_sae_id, link.slave_sae_id, exc_info=exc)
+
+    async def close(self) -> None:
+        for task in self._producers:
+            task.cancel()
+        await asyncio.gather(*self._producers, return_exceptions=True)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._own_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    def metrics(self) -> Dict:
+        return {"kme_id": self.kme_id, "links": [link.metrics() for link in self.links.values()]}
+
+    async def _route(self, method: str, target: str, body: bytes) -> Dict:
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        params = json.loads(body) if body else {}
+        if not isinstance(params, dict):
+            raise KeyRequestError(400, "request body must be a JSON object")
+        parts = url.path.strip("/").split("/")
+
+        if parts == ["api", "v1", "metrics"]:
+            return self.metrics()
+        if len(parts) != 5 or parts[:3] != ["api", "v1", "keys"]:
+            raise KeyRequestError(404, f"no such resource: {url.path}")
+        if method not in ("GET", "POST"):
+            raise KeyRequestError(405, f"method {method} not allowed")
+        sae_id, action = parts[3], parts[4]
+
+        if action in ("status", "enc_keys"):
+            link = self.links.get(sae_id)
+            if link is None:
+                raise KeyRequestError(400, f"unknown slave_SAE_ID: {sae_id}")
+            if action == "status":
+                return link.status(self.kme_id)
+            number = _int_param("number", params.get("number", query.get("number", [1])[0]))
+            size = _int_param("size", params.get("size", query.get("size", [link.key_size])[0]))
+            if not 1 <= number <= link.max_key_per_request:
+                raise KeyRequestError(400, f"number must be between 1 and {link.max_key_per_request}")
+            if size != link.key_size:
+                raise KeyRequestError(400, f"size must be {link.key_size}")
+            return {"keys": await link.take(number, self.wait_timeout)}
+
+        if action == "dec_keys":
+            links = self.masters.get(sae_id)
+            if links is None:
+                raise KeyRequestError(400, f"unknown master_SAE_ID: {sae_id}")
+            key_ids = _key_ids(params.get("key_IDs", [])) or query.get("key_ID", [])
+            if not key_ids:
+                raise KeyRequestError(400, "no key_ID given")
+            return {"keys": _fetch(links, key_ids)}
+        raise KeyRequestError(404, f"no such resource: {url.path}")
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict, bytes]]:
+        # (method, target, headers, body) of the next request, None at end of stream;
+        # raises ValueError for a malformed request line or header
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise ValueError(f"malformed request line: {request_line[:80]!r}")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, sep, value = line.decode("latin-1").partition(":")
+            if not sep:
+                raise ValueError(f"malformed header: {line[:80]!r}")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length < 0:
+            raise ValueError("negative Content-Length")
+        return parts[0], parts[1], headers, await reader.readexactly(length)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Minimal HTTP/1.1 with keep-alive; one request at a time per connection.
+        # Errors are answered with an ETSI-style {"message", "details"} body.
+        def respond(status: int, payload: Dict, close: bool) -> None:
+            data = json.dumps(payload).encode()
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\nConnection: {'close' if close else 'keep-alive'}\r\n\r\n"
+                .encode() + data
+            )
+
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except ValueError as e:
+                    # The stream position is unknown after a bad request, so answer and close
+                    respond(400, {"message": "bad request", "details": [{"reason": str(e)}]}, True)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+
+                try:
+                    status, payload = 200, await self._route(method, target, body)
+                except KeyRequestError as e:
+                    status, payload = e.status, {"message": str(e)}
+                except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                    status, payload = 400, {"message": "bad request", "details": [{"reason": f"invalid JSON: {e}"}]}
+                except Exception as e:
+                    _log.exception("error handling %s %s", method, target)
+                    status, payload = 500, {"message": "internal error", "details": [{"reason": str(e)}]}
+                close = headers.get("connection", "").lower() == "close"
+                respond(status, payload, close)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def parse_link(spec: str, **defaults) -> Link:
+    """Build a Link from ``MASTER:SLAVE[:EVE_PROB]``, e.g. ``alice:bob:0.1``."""
+    parts = spec.split(":")
+    if len(parts) not in (2, 3):
+        raise ValueError(f"link spec must be MASTER:SLAVE[:EVE_PROB], got {spec!r}")
+    if len(parts) == 3:
+        defaults["eve_prob"] = float(parts[2])
+    return Link(parts[0], parts[1], **defaults)
@@ -1,9 +1,16 @@
 
-import tkinter as tk
-from gui import BB84App
+import sys
 
 
 def main():
+    # Any arguments select the headless CLI; Tk and the GUI stack are only loaded without them
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
+    import tkinter as tk
+    from gui import BB84App
+
     root = tk.Tk()
     app = BB84App(root)
     root.mainloop()
@@ -0,0 +1,88 @@
+import numpy as np
+from typing import Union
+from keys import BitKey
+
+# Seed bits are generated in independent fixed-size blocks so any window of the
+# (conceptually infinite) seed string can be produced without the bits before it.
+SEED_BLOCK_BITS = 1 << 16
+DEFAULT_BLOCK_BITS = 1 << 20
+# Keys whose length plus output length fits here are hashed with one FFT (~200 MB peak at the limit)
+SINGLE_FFT_BITS = 1 << 23
+
+
+def toeplitz_seed_bits(seed: int, start: int, stop: int) -> np.ndarray:
+    """Bits ``start:stop`` of the reproducible seed string for ``seed``."""
+    out = np.empty(max(0, stop - start), dtype=np.uint8)
+    pos = start
+    while pos < stop:
+        block = pos // SEED_BLOCK_BITS
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block,)))
+        bits = rng.integers(0, 2, size=SEED_BLOCK_BITS, dtype=np.uint8)
+        lo = pos - block * SEED_BLOCK_BITS
+        hi = min(SEED_BLOCK_BITS, stop - block * SEED_BLOCK_BITS)
+        out[pos - start:pos - start + hi - lo] = bits[lo:hi]
+        pos += hi - lo
+    return out
+
+
+def _hash_window(seed: int, x: np.ndarray, j0: int, i0: int, i1: int) -> np.ndarray:
+    # Parity of sum_j s[i + j0 + j] * x[j] for i in [i0, i1), via one FFT convolution
+    n = len(x)
+    seg = toeplitz_seed_bits(seed, i0 + j0, i1 + j0 + n - 1).astype(np.float64)
+    # Circular convolution: wrap-around only reaches the first n - 1 outputs, which are not used
+    size = 1 << int(len(seg) - 1).bit_length()
+    conv = np.fft.irfft(np.fft.rfft(seg, size) * np.fft.rfft(x[::-1].astype(np.float64), size), size)
+    return np.rint(conv[n - 1:n - 1 + (i1 - i0)]).astype(np.int64) & 1
+
+
+class StreamingToeplitzHasher:
+    """Two-universal hash of a bit stream fed in chunks of any size.
+
+    The output is ``y = H x`` over GF(2) with ``H[i, j] = s[i + j]``, a Toeplitz
+    matrix with its columns reversed (a Hankel matrix, which is the same
+    two-universal family), where ``s`` comes from ``toeplitz_seed_bits(seed)``.
+    Because the matrix does not depend on the input length, the input can be
+    streamed. Each chunk costs O((chunk + out) log) per output tile, and only the
+    current chunk and the output are kept in memory.
+    """
+
+    def __init__(self, output_len: int, seed: int, block_bits: int = DEFAULT_BLOCK_BITS):
+        self.output_len = int(output_len)
+        self.seed = seed
+        self.block_bits = block_bits
+        self._offset = 0
+        self._acc = np.zeros(self.output_len, dtype=np.uint8)
+
+    def update(self, chunk: Union[BitKey, np.ndarray]) -> None:
+        if isinstance(chunk, BitKey):
+            for start in range(0, len(chunk), self.block_bits):
+                self._update_bits(chunk[start:start + self.block_bits].to_bits())
+        else:
+            chunk = np.asarray(chunk, dtype=np.uint8)
+            for start in range(0, len(chunk), self.block_bits):
+                self._update_bits(chunk[start:start + self.block_bits])
+
+    def _update_bits(self, bits: np.ndarray) -> None:
+        for i0 in range(0, self.output_len, self.block_bits):
+            i1 = min(self.output_len, i0 + self.block_bits)
+            self._acc[i0:i1] ^= _hash_window(self.seed, bits, self._offset, i0, i1).astype(np.uint8)
+        self._offset += len(bits)
+
+    def digest(self) -> BitKey:
+        return BitKey.from_bits(self._acc)
+
+
+def toeplitz_hash(key: BitKey, output_len: int, seed: int, block_bits: int = DEFAULT_BLOCK_BITS) -> BitKey:
+    """Compress ``key`` to ``output_len`` bits with seeded Toeplitz hashing.
+
+    When the key and output together fit in ``SINGLE_FFT_BITS`` they are hashed
+    with a single FFT convolution, i.e. O((n + m) log(n + m)); larger inputs are
+    streamed in ``block_bits`` tiles with the same result.
+    """
+    if len(key) == 0 or output_len <= 0:
+        return BitKey.empty()
+    if len(key) + output_len <= SINGLE_FFT_BITS:
+        return BitKey.from_bits(_hash_window(seed, key.to_bits(), 0, 0, output_len).astype(np.uint8))
+    hasher = StreamingToeplitzHasher(output_len, seed, block_bits)
+    hasher.update(key)
+    return hasher.digest()
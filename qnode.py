@@ -1,12 +1,34 @@
-import pennylane as qml
-from pennylane import numpy as np
-import matplotlib.pyplot as plt
+import numpy as np
+
+# Basis codes used by the batched backends (bases may also be given as 'Z'/'X')
+BASIS_Z = 0
+BASIS_X = 1
+
+_qml = None
+_measure_qnode = None
+_probs_qnode = None
+
+
+def _pennylane():
+    """Import PennyLane on first use so that analytic runs never load it."""
+    global _qml
+    if _qml is None:
+        import pennylane as qml
+        _qml = qml
+    return _qml
+
+
+def _basis_codes(bases):
+    """Convert an array of 'Z'/'X' labels (or 0/1 codes) to uint8 basis codes."""
+    bases = np.asarray(bases)
+    if bases.dtype.kind in ('U', 'S', 'O'):
+        return (bases == 'X').astype(np.uint8)
+    return bases.astype(np.uint8, copy=False)
 
-# Quantum device: 1 qubit, 1 shot per measurement
-dev = qml.device("default.qubit", wires=1, shots=1)
 
 def encode_qubit(bit, basis):
     """Encode a classical bit into a qubit in the given basis ('Z' or 'X')."""
+    qml = _pennylane()
     if basis == 'Z':
         # Z basis: |0> for bit=0, |1> for bit=1
         if bit == 1:
@@ -18,15 +40,166 @@ def encode_qubit(bit, basis):
         qml.Hadamard(wires=0)
 
 
-# QNode to encode and measure a qubit
-@qml.qnode(dev)
+def _build_measure_qnode():
+    qml = _pennylane()
+    # Quantum device: 1 qubit, 1 shot per measurement
+    dev = qml.device("default.qubit", wires=1, shots=1)
+
+    @qml.qnode(dev)
+    def circuit(bit, prep_basis, meas_basis):
+        encode_qubit(bit, prep_basis)
+        if meas_basis == 'X':
+            qml.Hadamard(wires=0)  # Rotate back to computational basis
+        return qml.sample(wires=0)  # Single-shot measurement
+
+    return circuit
+
+
+def _build_probs_qnode():
+    qml = _pennylane()
+    # Exact outcome probabilities, so the caller's generator can draw the shot
+    dev = qml.device("default.qubit", wires=1)
+
+    @qml.qnode(dev)
+    def circuit(bit, prep_basis, meas_basis):
+        encode_qubit(bit, prep_basis)
+        if meas_basis == 'X':
+            qml.Hadamard(wires=0)
+        return qml.probs(wires=0)
+
+    return circuit
+
+
+def probability_one(bit, prep_basis, meas_basis) -> float:
+    """Probability of measuring 1, computed by PennyLane without sampling."""
+    global _probs_qnode
+    if _probs_qnode is None:
+        _probs_qnode = _build_probs_qnode()
+    return float(_probs_qnode(bit, prep_basis, meas_basis)[1])
+
+
+# QNode to encode and measure a qubit (built lazily on first call)
 def measure_qubit(bit, prep_basis, meas_basis):
-    encode_qubit(bit, prep_basis)
-    if meas_basis == 'X':
-        qml.Hadamard(wires=0)  # Rotate back to computational basis
-    return qml.sample(wires=0)  # Single-shot measurement
+    global _measure_qnode
+    if _measure_qnode is None:
+        _measure_qnode = _build_measure_qnode()
+    return _measure_qnode(bit, prep_basis, meas_basis)
 
 # Wrapper for BB84 simulation use
 def measure_bit_with_pennylane(bit, prep_basis, meas_basis):
     result = measure_qubit(bit, prep_basis, meas_basis)
-    return int(result)  # Convert to int for consistency
\ No newline at end of file
+    return int(result)  # Convert to int for consistency
+
+
+class MeasurementBackend:
+    """Measures qubits prepared as (bit, prep_basis) in meas_basis."""
+
+    name = "base"
+
+    def measure(self, bit, prep_basis, meas_basis, rng=None) -> int:
+        result = self.measure_batch(np.array([bit]), np.array([prep_basis]), np.array([meas_basis]), rng)
+        return int(result[0])
+
+    def measure_batch(self, bits, prep_bases, meas_bases, rng=None) -> np.ndarray:
+        """Return a uint8 array of outcomes for the given (bit, prep_basis, meas_basis) triples."""
+        raise NotImplementedError
+
+
+class PennyLaneBackend(MeasurementBackend):
+    """One circuit execution per qubit (the original path).
+
+    With an ``rng`` the circuit returns exact probabilities and the shot is drawn
+    from ``rng``, so seeded runs are reproducible; without one the device samples.
+    """
+
+    name = "pennylane"
+
+    def measure(self, bit, prep_basis, meas_basis, rng=None) -> int:
+        if not isinstance(prep_basis, str):
+            prep_basis = 'X' if prep_basis == BASIS_X else 'Z'
+        if not isinstance(meas_basis, str):
+            meas_basis = 'X' if meas_basis == BASIS_X else 'Z'
+        if rng is None:
+            return int(measure_qubit(int(bit), prep_basis, meas_basis))
+        return int(rng.random() < probability_one(int(bit), prep_basis, meas_basis))
+
+    def measure_batch(self, bits, prep_bases, meas_bases, rng=None) -> np.ndarray:
+        prep = _basis_codes(prep_bases)
+        meas = _basis_codes(meas_bases)
+        return np.array([self.measure(b, p, m, rng) for b, p, m in zip(bits, prep, meas)], dtype=np.uint8)
+
+
+class BatchedPennyLaneBackend(MeasurementBackend):
+    """Measures many qubits in one execution using parameter broadcasting.
+
+    Preparation and measurement are folded into a single RY rotation: the state
+    RY(pi * bit + pi/2 * prep_basis)|0> is rotated by RY(-pi/2 * meas_basis) before
+    a computational-basis sample, so each triple becomes one broadcast angle.
+    Without a device ``seed`` the shots are drawn from the ``rng`` passed in.
+    """
+
+    name = "pennylane_batched"
+
+    def __init__(self, max_batch: int = 65536, seed=None):
+        self.max_batch = max_batch
+        self.seed = seed
+        self._circuit = None
+        self._sampling = None
+
+    def _build(self, sample: bool):
+        qml = _pennylane()
+        dev = qml.device("default.qubit", wires=1, shots=1, seed=self.seed) if sample else \
+            qml.device("default.qubit", wires=1)
+
+        @qml.qnode(dev)
+        def circuit(theta):
+            qml.RY(theta, wires=0)
+            return qml.sample(wires=0) if sample else qml.probs(wires=0)
+
+        return circuit
+
+    def measure_batch(self, bits, prep_bases, meas_bases, rng=None) -> np.ndarray:
+        sample = rng is None or self.seed is not None
+        if self._circuit is None or self._sampling != sample:
+            self._circuit, self._sampling = self._build(sample), sample
+        bits = np.asarray(bits, dtype=np.uint8)
+        theta = np.pi * bits + (np.pi / 2) * (_basis_codes(prep_bases).astype(float) - _basis_codes(meas_bases))
+        out = np.empty(len(theta), dtype=np.uint8)
+        for start in range(0, len(theta), self.max_batch):
+            chunk = theta[start:start + self.max_batch]
+            if sample:
+                out[start:start + len(chunk)] = np.atleast_1d(self._circuit(chunk)).reshape(-1)
+            else:
+                p1 = np.reshape(self._circuit(chunk), (-1, 2))[:, 1]
+                out[start:start + len(chunk)] = rng.random(len(chunk)) < p1
+        return out
+
+
+class NumpyBackend(MeasurementBackend):
+    """Analytic backend: deterministic in the preparation basis, a fair coin otherwise."""
+
+    name = "numpy"
+
+    def measure_batch(self, bits, prep_bases, meas_bases, rng=None) -> np.ndarray:
+        if rng is None:
+            rng = np.random.default_rng()
+        bits = np.asarray(bits, dtype=np.uint8)
+        coins = rng.integers(0, 2, size=len(bits), dtype=np.uint8)
+        return np.where(_basis_codes(prep_bases) == _basis_codes(meas_bases), bits, coins)
+
+
+BACKENDS = {
+    PennyLaneBackend.name: PennyLaneBackend,
+    BatchedPennyLaneBackend.name: BatchedPennyLaneBackend,
+    NumpyBackend.name: NumpyBackend,
+}
+
+
+def get_backend(backend, **kwargs) -> MeasurementBackend:
+    """Return a backend instance from a name in BACKENDS or pass an instance through."""
+    if isinstance(backend, MeasurementBackend):
+        return backend
+    try:
+        return BACKENDS[backend](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown measurement backend: {backend!r}") from None
@@ -0,0 +1,108 @@
+import numpy as np
+from typing import Dict, Optional, Tuple
+from keys import BitKey
+
+
+def binary_entropy(q: float) -> float:
+    if q <= 0.0 or q >= 1.0:
+        return 0.0
+    return float(-q * np.log2(q) - (1 - q) * np.log2(1 - q))
+
+
+def initial_block_size(qber: float, n: int) -> int:
+    """First-pass Cascade block size, the usual 0.73 / QBER rule clamped to [4, n]."""
+    return int(min(max(n, 1), max(4, int(0.73 / max(qber, 1e-3)))))
+
+
+def _block_parities(bits: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    return np.bitwise_xor.reduceat(bits, starts)
+
+
+def _locate_errors(pa: np.ndarray, pb: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> Tuple[np.ndarray, int]:
+    # Binary search every odd-parity block at once; one disclosed parity bit per
+    # active block per halving step. Returns error positions and bits disclosed.
+    ca = np.concatenate(([0], np.cumsum(pa, dtype=np.int64)))
+    cb = np.concatenate(([0], np.cumsum(pb, dtype=np.int64)))
+    lo = lo.copy()
+    hi = hi.copy()
+    disclosed = 0
+    active = hi - lo > 1
+    while active.any():
+        disclosed += int(active.sum())
+        mid = (lo + hi) // 2
+        left_differs = ((ca[mid] - ca[lo]) & 1) != ((cb[mid] - cb[lo]) & 1)
+        hi = np.where(active & left_differs, mid, hi)
+        lo = np.where(active & ~left_differs, mid, lo)
+        active = hi - lo > 1
+    return lo, disclosed
+
+
+def cascade(key_a: BitKey, key_b: BitKey, qber: float, passes: int = 4,
+            block_size: Optional[int] = None, rng: Optional[np.random.Generator] = None) -> Tuple[BitKey, Dict]:
+    """Reconcile Bob's key against Alice's with the Cascade protocol.
+
+    Pass ``p`` uses blocks of ``block_size * 2**p`` bits over a fresh random
+    permutation (the first pass uses the identity). Block parities are XOR
+    reductions over all blocks at once and the binary searches for every odd
+    block run in lockstep. Whenever a correction flips a bit, blocks of earlier
+    passes containing it are re-checked, as in the original protocol.
+
+    Returns Bob's corrected key and a dict with the number of parity bits
+    actually disclosed, the measured efficiency and the residual error count.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    n = len(key_a)
+    a = key_a.to_bits()
+    b = key_b.to_bits().copy()
+    initial_errors = int(np.count_nonzero(a != b))
+    k1 = block_size or initial_block_size(qber, n)
+
+    perms = []
+    sizes = []
+    alice_parities = []
+    leaked = 0
+    corrected = 0
+
+    for p in range(passes if n > 0 else 0):
+        perm = np.arange(n) if p == 0 else rng.permutation(n)
+        size = min(n, k1 << p)
+        starts = np.arange(0, n, size)
+        perms.append(perm)
+        sizes.append(size)
+        alice_parities.append(_block_parities(a[perm], starts))
+        leaked += len(starts)
+
+        # Resolve odd blocks in this and all earlier passes until none are left
+        changed = True
+        while changed:
+            changed = False
+            for q in range(p + 1):
+                starts_q = np.arange(0, n, sizes[q])
+                pb = b[perms[q]]
+                odd = np.flatnonzero(_block_parities(pb, starts_q) != alice_parities[q])
+                if len(odd) == 0:
+                    continue
+                lo = starts_q[odd]
+                hi = np.minimum(lo + sizes[q], n)
+                pos, disclosed = _locate_errors(a[perms[q]], pb, lo, hi)
+                leaked += disclosed
+                b[perms[q][pos]] ^= 1
+                corrected += len(pos)
+                changed = True
+
+        if sizes[-1] >= n:
+            break
+
+    residual = int(np.count_nonzero(a != b))
+    ideal = n * binary_entropy(initial_errors / n) if n else 0.0
+    info = {
+        "leaked_bits": leaked,
+        "passes": len(sizes),
+        "block_sizes": sizes,
+        "corrected_bits": corrected,
+        "initial_errors": initial_errors,
+        "residual_errors": residual,
+        "efficiency": leaked / ideal if ideal > 0 else None
+    }
+    return BitKey.from_bits(b), info
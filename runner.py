@@ -1,34 +1,715 @@
-from BB84 import simulate_bb84_stream
+from BB84 import ABORT_THRESHOLD, ENGINE_VERSION, run_bb84
+from aggregate import TrialAggregate
+from analytic import CHUNK_TRIALS, sample_trials, trial_summary
+from cache import ResultCache, get_cache, trial_key
+from checkpoint import Checkpoint, get_checkpoint
+from eve import get_strategy
+from grid import DEFAULT_MEMORY_BUDGET, iter_grid, simulate_grid
+from instrument import StageTimer
+import os
+import queue
+import signal
+import threading
+import time
 import numpy as np
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
-def batch_run_bb84(n_qubits, eve_prob, test_fraction, trials):
-    results = []
-    for _ in range(trials):
-        gen = simulate_bb84_stream(n_qubits, eve_prob, test_fraction)
-        res = None
-        for data in gen:
-            if data.get("final"):
-                res = data
-        if res is not None:
-            results.append(res)
-
-    # Now aggregate results (means, stddev, etc.)
-    if not results:
+_NO_POOL = nullcontext()
+# Trials spawned, run and folded per step of batch_run_bb84; bounds memory for huge batches
+BATCH_CHUNK = 4096
+# Two-sided 95% normal quantile used for sweep confidence intervals
+_Z95 = 1.959964
+
+
+def _run_trial(task):
+    # Runs in a worker process; only a small summary is sent back to the parent
+    n_qubits, eve_prob, test_fraction, seed_seq, engine, profile, eve_strategy = task
+    rng = np.random.default_rng(seed_seq)
+    start = time.perf_counter()
+    if engine == "stats":
+        return {**trial_summary(n_qubits, eve_prob, test_fraction, rng, eve_strategy),
+                "wall_time": time.perf_counter() - start}
+    if engine == "grid":
+        # A one-cell grid, for per-cell callers such as the adaptive sweep
+        row = simulate_grid([eve_prob], n_qubits, 1, test_fraction, seed_seq)[0]
+        observed = float(row["observed_error_rate"])
         return {
-            "mean_error": None,
-            "std_error": None,
-            "mean_sift": None
+            "observed_error_rate": None if np.isnan(observed) else observed,
+            "sift_rate": float(row["sift_rate"]),
+            "final_key_len": int(row["final_key_len"]),
+            "aborted": bool(row["aborted"]),
+            "wall_time": time.perf_counter() - start
         }
-    
-    observed_errors = [r["observed_error_rate"] for r in results if r["observed_error_rate"] is not None]
-    sift_rates = [r["sift_rate"] for r in results if r["sift_rate"] is not None]
+    res = run_bb84(n_qubits=n_qubits, eve_prob=eve_prob, eve_strategy=eve_strategy, test_fraction=test_fraction,
+                   rng=rng, engine=engine, profile=profile)
+    summary = {
+        "observed_error_rate": res["observed_error_rate"],
+        "sift_rate": res["sift_rate"],
+        "final_key_len": res["stats"]["final_key_len"],
+        "aborted": res["stats"]["aborted"],
+        "wall_time": time.perf_counter() - start
+    }
+    if profile:
+        summary["timings"] = res["stats"]["timings"]
+        summary["counters"] = res["stats"]["counters"]
+    return summary
+
+
+def _task_key(task) -> str:
+    n_qubits, eve_prob, test_fraction, seed_seq, engine, _, eve_strategy = task
+    params = {"n_qubits": int(n_qubits), "eve_prob": float(eve_prob), "test_fraction": float(test_fraction),
+              "engine": engine}
+    # Left out for the default so results cached before strategies existed stay valid
+    if eve_strategy != "intercept_random":
+        params["eve_strategy"] = eve_strategy
+    return trial_key(params, seed_seq, ENGINE_VERSION)
+
+
+def _lookup(cache: Optional[ResultCache], tasks: List) -> Tuple[List[Optional[str]], Dict[str, Dict]]:
+    # Cache keys for every task and the summaries already stored for them
+    if cache is None:
+        return [None] * len(tasks), {}
+    keys = [_task_key(t) for t in tasks]
+    return keys, cache.get_many(keys)
+
+
+def _sampled_chunks(n_qubits: int, eve_prob: float, test_fraction: float, trials: int, rng: np.random.Generator,
+                    eve_strategy: str = "intercept_random", start: int = 0) -> Iterable[Dict[str, np.ndarray]]:
+    for first in range(start, trials, CHUNK_TRIALS):
+        yield sample_trials(n_qubits, eve_prob, test_fraction, min(CHUNK_TRIALS, trials - first), rng,
+                            eve_strategy=eve_strategy)
+
+
+def _check_strategy(engine: str, eve_strategy: str) -> None:
+    get_strategy(eve_strategy)
+    if engine == "grid" and eve_strategy != "intercept_random":
+        raise ValueError(f"The grid engine only supports intercept_random, not {eve_strategy!r}")
+
+
+def _chunk_summaries(chunk) -> Iterable[Dict]:
+    # Per-trial summaries of a vectorized chunk, in the format of _run_trial
+    errs = chunk["observed_error_rate"]
+    for i in range(len(errs)):
+        yield {
+            "observed_error_rate": None if np.isnan(errs[i]) else float(errs[i]),
+            "sift_rate": float(chunk["sift_rate"][i]),
+            "final_key_len": int(chunk["final_key_len"][i]),
+            "aborted": bool(chunk["aborted"][i])
+        }
+
+
+def _collect_metrics(name: str, timer: StageTimer, extra: Dict,
+                     metrics_hook: Optional[Callable[[Dict], None]]) -> Dict:
+    # Per-stage timings and counters summed over trials, passed to the export hook
+    metrics = {"name": name, **timer.as_dict(), **extra}
+    if metrics_hook is not None:
+        metrics_hook(metrics)
+    return metrics
+
+
+def _worker_init() -> None:
+    # Pool workers leave Ctrl-C to the parent, which cancels cooperatively
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _seed_entropy(seed):
+    return None if seed is None else np.random.SeedSequence(seed).entropy
+
+
+def _resume(checkpoint: Optional[Checkpoint], kind: str, params: Dict, seed) -> Tuple[np.random.SeedSequence,
+                                                                                        Optional[Dict]]:
+    # Root seed and saved state; an unseeded run takes its entropy from the checkpoint
+    saved = checkpoint.load(kind, params) if checkpoint is not None else None
+    return np.random.SeedSequence(saved["entropy"] if saved else seed), saved
+
+
+def batch_run_bb84(n_qubits, eve_prob, test_fraction, trials, workers: Optional[int] = 1,
+                   seed=None, engine: str = "vectorized", profile: bool = False,
+                   metrics_hook: Optional[Callable[[Dict], None]] = None,
+                   on_trial: Optional[Callable[[int, Dict], None]] = None,
+                   cache: Union[bool, str, ResultCache, None] = None,
+                   memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                   progress: Optional[queue.Queue] = None, eve_strategy: str = "intercept_random",
+                   cancel: Optional[threading.Event] = None, checkpoint: Union[str, Checkpoint, None] = None):
+    """Run `trials` independent BB84 simulations and aggregate their statistics.
+
+    Each trial draws from its own child of ``np.random.SeedSequence(seed)``, so the
+    aggregates are identical for any ``workers`` count. ``workers=None`` uses every
+    CPU; ``workers=1`` runs in-process without a pool.
+
+    Trials are spawned and run ``BATCH_CHUNK`` at a time and folded, in trial
+    order, into a ``TrialAggregate``, so memory stays constant however many
+    trials run. After every chunk the partial result is put on ``progress`` as an
+    ``("aggregate", result)`` message. Besides the mean and std of the error
+    rate the result has abort counts, error-rate and key-length quantiles and
+    per-trial wall-time statistics (``trial_time``).
+
+    With ``profile=True`` per-stage timings and counters are summed over trials
+    into ``metrics`` and passed to ``metrics_hook`` (see ``instrument`` exporters).
+    ``on_trial(index, summary)`` is called for every trial, in trial order.
+
+    ``engine="stats"`` samples the trial statistics from their closed-form
+    distributions (see ``analytic``) in-process, vectorized over trials; it
+    ignores ``workers``, ``profile`` and ``cache`` and has no trial times.
+    ``engine="grid"`` does the same with the tensorized simulation of ``grid``,
+    tiled to ``memory_budget`` bytes (intercept-resend only).
+
+    ``eve_strategy`` names an attack from ``eve.STRATEGIES``.
+
+    ``cache`` (``True``, a path or a ``ResultCache``) reuses stored trial
+    summaries and computes only the missing trials; raising ``trials`` with the
+    same ``seed`` extends an earlier batch. It is ignored without an explicit
+    ``seed`` and when profiling, since neither result would be reusable.
+
+    Setting ``cancel`` stops the batch after the current trial (per-trial
+    engines; trials already finished on the pool are still kept) or chunk; the
+    result then has ``cancelled=True``. ``checkpoint``
+    (a path or a ``checkpoint.Checkpoint``) saves the aggregate, the next trial
+    and any RNG state periodically and on exit; calling again with the same
+    arguments and file resumes there with results identical to an
+    uninterrupted run.
+    """
+    _check_strategy(engine, eve_strategy)
+    checkpoint = get_checkpoint(checkpoint)
+    params = {"n_qubits": int(n_qubits), "eve_prob": float(eve_prob), "test_fraction": float(test_fraction),
+              "trials": int(trials), "engine": engine, "eve_strategy": eve_strategy, "profile": bool(profile),
+              "seed": _seed_entropy(seed), "engine_version": ENGINE_VERSION}
+    if engine == "grid":
+        params["memory_budget"] = int(memory_budget)
+    seed_seq, saved = _resume(checkpoint, "batch", params, seed)
+    workers = workers or os.cpu_count() or 1
+    cache = get_cache(cache) if seed is not None and not profile else None
+    agg = TrialAggregate.from_dict(saved["aggregate"]) if saved else TrialAggregate()
+    timer = StageTimer()
+    if saved:
+        timer.merge(saved["timer"])
+    resumed = agg.trials
+    n_computed = 0
+    cancelled = False
+    rng, tiles = None, saved.get("tiles", 0) if saved else 0
+    if engine in ("stats", "grid"):
+        rng = np.random.default_rng(seed_seq)
+        if saved:
+            rng.bit_generator.state = saved["rng"]
+
+    def save():
+        state = {"entropy": seed_seq.entropy, "aggregate": agg.to_dict(), "timer": timer.as_dict()}
+        if rng is not None:
+            state.update(rng=rng.bit_generator.state, tiles=tiles)
+        checkpoint.save("batch", params, state)
+
+    def report():
+        if progress is not None:
+            progress.put(("aggregate", {**agg.result(), "trials": agg.trials}))
+        if checkpoint is not None and checkpoint.due():
+            save()
+
+    start = time.perf_counter()
+    try:
+        if engine in ("stats", "grid"):
+            if engine == "stats":
+                chunks = _sampled_chunks(n_qubits, eve_prob, test_fraction, trials, rng, eve_strategy, agg.trials)
+            else:
+                chunks = iter_grid([eve_prob], n_qubits, trials, test_fraction, rng, memory_budget,
+                                   skip_tiles=tiles)
+            for chunk in chunks:
+                if on_trial is not None:
+                    for i, summary in enumerate(_chunk_summaries(chunk), start=agg.trials):
+                        on_trial(i, summary)
+                agg.add_chunk(chunk)
+                tiles += 1
+                report()
+                if cancel is not None and cancel.is_set() and agg.trials < trials:
+                    cancelled = True
+                    break
+            workers, profile = 1, False
+        else:
+            pool, pending, computed = None, {}, {}
+
+            def collect(futures):
+                for fut in futures:
+                    computed[pending.pop(fut)] = fut.result()
+
+            try:
+                for first in range(agg.trials, trials, BATCH_CHUNK):
+                    tasks = [(n_qubits, eve_prob, test_fraction, _child_seed(seed_seq, i), engine, profile,
+                              eve_strategy) for i in range(first, min(first + BATCH_CHUNK, trials))]
+                    keys, cached = _lookup(cache, tasks)
+                    missing = [i for i, k in enumerate(keys, start=first) if k not in cached]
+                    if pool is None and workers > 1 and len(missing) > 1:
+                        pool = ProcessPoolExecutor(max_workers=min(workers, len(missing)), initializer=_worker_init)
+                    pending = {pool.submit(_run_trial, tasks[i - first]): i for i in missing} if pool else {}
+                    computed = {}
+                    try:
+                        for i, key in enumerate(keys, start=first):
+                            # On cancel, keep folding trials that have already finished and stop at the first
+                            # that has not; finished trials past that point are still cached below.
+                            if not cancelled and cancel is not None and cancel.is_set():
+                                cancelled = True
+                                collect([fut for fut in pending if fut.done()])
+                            while key not in cached and i not in computed and not cancelled:
+                                if pool is None:
+                                    computed[i] = _run_trial(tasks[i - first])
+                                    break
+                                collect(wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)[0])
+                                if cancel is not None and cancel.is_set():
+                                    cancelled = True
+                                    collect([fut for fut in pending if fut.done()])
+                            if key in cached:
+                                summary = cached[key]
+                            elif i in computed:
+                                summary = computed[i]
+                                n_computed += 1
+                            else:
+                                break
+                            agg.add(summary)
+                            if profile:
+                                timer.merge(summary)
+                            if on_trial is not None:
+                                on_trial(i, summary)
+                    finally:
+                        if cache is not None:
+                            cache.put_many([(keys[i - first], summary) for i, summary in sorted(computed.items())])
+                    report()
+                    if cancelled:
+                        break
+            finally:
+                if pool is not None:
+                    pool.shutdown(cancel_futures=True)
+    finally:
+        if checkpoint is not None:
+            save()
+    wall_time = time.perf_counter() - start
+
+    ran = agg.trials - resumed
+    result = {
+        **agg.result(),
+        "trials": agg.trials,
+        "cancelled": cancelled,
+        "resumed_trials": resumed,
+        "cache_hits": ran - n_computed if cache is not None else 0,
+        "workers": workers,
+        "seed": seed_seq.entropy,
+        "wall_time": wall_time,
+        "trials_per_sec": ran / wall_time if wall_time > 0 else None
+    }
+    if profile:
+        result["metrics"] = _collect_metrics(
+            "batch_run_bb84", timer,
+            {k: result[k] for k in ("trials", "wall_time", "trials_per_sec")}, metrics_hook
+        )
+    return result
+
+
+def _child_seed(seed_seq: np.random.SeedSequence, i: int) -> np.random.SeedSequence:
+    # The i-th child seed_seq.spawn would give, without spawning the ones before it
+    return np.random.SeedSequence(seed_seq.entropy, spawn_key=seed_seq.spawn_key + (i,),
+                                  pool_size=seed_seq.pool_size)
+
+
+def _point_key(eve_prob: float) -> int:
+    return int(round(eve_prob * 1_000_000))
+
+
+def sweep_cell_seed(seed_seq: np.random.SeedSequence, eve_prob: float, trial: int) -> np.random.SeedSequence:
+    """Seed for one (eve_prob, trial) cell; stable when points or trials are added."""
+    return np.random.SeedSequence(seed_seq.entropy, spawn_key=(_point_key(eve_prob), trial))
 
-    mean_error = float(np.mean(observed_errors)) if observed_errors else None
-    std_error = float(np.std(observed_errors)) if observed_errors else None
-    mean_sift = float(np.mean(sift_rates)) if sift_rates else None
 
+def _sweep_errors(summaries: List[Dict]) -> List[float]:
+    # Sweeps count a trial with no sifted bits as zero observed error
+    return [0.0 if s["observed_error_rate"] is None else s["observed_error_rate"] for s in summaries]
+
+
+def _point_aggregate(eve_prob: float, summaries: List[Dict]) -> Dict:
+    errs = _sweep_errors(summaries)
+    sifts = [s["sift_rate"] for s in summaries]
     return {
-        "mean_error": mean_error,
-        "std_error": std_error,
-        "mean_sift": mean_sift
+        "eve_prob": eve_prob,
+        "trials": len(summaries),
+        "mean_error": float(np.mean(errs)) if errs else None,
+        "std_error": float(np.std(errs)) if errs else None,
+        "mean_sift": float(np.mean(sifts)) if sifts else None
+    }
+
+
+def _chunk_aggregate(eve_prob: float, chunks: Iterable, agg: Optional[TrialAggregate] = None) -> Dict:
+    # Sweep point aggregate over vectorized chunks (sampled trials or grid rows), folded into agg if given
+    if agg is None:
+        agg = TrialAggregate(none_as_zero=True)
+    for chunk in chunks:
+        agg.add_chunk(chunk)
+    res = agg.result()
+    return {"eve_prob": eve_prob, "trials": agg.trials,
+            **{k: res[k] for k in ("mean_error", "std_error", "mean_sift")}}
+
+
+def _run_cells(cells: List[Tuple[float, int]], tasks: Dict, done: Dict[float, Dict[int, Dict]],
+               workers: int, cache: Optional[ResultCache], cancel: Optional[threading.Event],
+               on_point: Callable[[float, List[int]], None],
+               pool: Optional[ProcessPoolExecutor] = None) -> Tuple[bool, int]:
+    # Fill done[eve_prob][trial] for every cell, from the cache where possible and
+    # otherwise on a process pool (``pool`` if given, else a new one). on_point(p, trials)
+    # is called whenever a point gains results, with the new trials. Returns (cancelled, cells computed).
+    keys, cached = _lookup(cache, [tasks[cell] for cell in cells])
+    keys = dict(zip(cells, keys))
+    hits = {}
+    for p, t in cells:
+        if keys[p, t] in cached:
+            done[p][t] = cached[keys[p, t]]
+            hits.setdefault(p, []).append(t)
+    for p, trials in hits.items():
+        on_point(p, trials)
+    missing = [(p, t) for p, t in cells if t not in done[p]]
+
+    computed = []
+    cancelled = False
+
+    def record(p, trial, summary):
+        done[p][trial] = summary
+        computed.append((keys[p, trial], summary))
+        on_point(p, [trial])
+
+    try:
+        if workers == 1 or len(missing) <= 1:
+            for cell in missing:
+                if cancel is not None and cancel.is_set():
+                    cancelled = True
+                    break
+                record(*cell, _run_trial(tasks[cell]))
+        else:
+            own_pool = _NO_POOL if pool is not None else ProcessPoolExecutor(max_workers=min(workers, len(missing)),
+                                                                             initializer=_worker_init)
+            with own_pool as own:
+                pending = {(pool or own).submit(_run_trial, tasks[cell]): cell for cell in missing}
+                while pending:
+                    if cancel is not None and cancel.is_set():
+                        cancelled = True
+                        for fut in pending:
+                            fut.cancel()
+                        break
+                    finished, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        record(*pending.pop(fut), fut.result())
+    finally:
+        if cache is not None:
+            cache.put_many(computed)
+    return cancelled, len(computed)
+
+
+def run_sweep(eve_probs: Sequence[float], n_qubits: int, test_fraction: float, trials: int,
+              workers: Optional[int] = None, seed=None, engine: str = "vectorized",
+              progress: Optional[queue.Queue] = None, cancel: Optional[threading.Event] = None,
+              profile: bool = False, metrics_hook: Optional[Callable[[Dict], None]] = None,
+              cache: Union[bool, str, ResultCache, None] = None,
+              memory_budget: int = DEFAULT_MEMORY_BUDGET, eve_strategy: str = "intercept_random",
+              checkpoint: Union[str, Checkpoint, None] = None) -> Dict:
+    """Run every (eve_prob, trial) cell of a sweep concurrently on a process pool.
+
+    Partial per-point aggregates are put on ``progress`` as ``("point", aggregate)``
+    messages whenever a cell finishes. Setting ``cancel`` stops the sweep after the
+    cells already running; the returned dict then has ``cancelled=True``. Final
+    aggregates are computed in trial order, so they do not depend on ``workers``.
+    ``engine="stats"`` samples each point in one vectorized call instead of
+    per-cell tasks (one stream per point, so adding points keeps earlier ones).
+    ``engine="grid"`` simulates the whole sweep in-process as tiled array
+    operations (see ``grid``); progress and cancellation happen per tile.
+    ``profile``, ``metrics_hook``, ``cache`` and ``eve_strategy`` behave as in ``batch_run_bb84``;
+    with a cache, only (eve_prob, trial) cells not stored yet are computed, so
+    adding points or trials to an earlier sweep runs just the new cells.
+    ``checkpoint`` saves the finished cells (or points, or tiles and RNG state
+    for the vectorized engines) so an interrupted sweep resumes where it
+    stopped, as in ``batch_run_bb84``.
+    """
+    _check_strategy(engine, eve_strategy)
+    checkpoint = get_checkpoint(checkpoint)
+    eve_probs = [float(p) for p in eve_probs]
+    params = {"eve_probs": eve_probs, "n_qubits": int(n_qubits), "test_fraction": float(test_fraction),
+              "trials": int(trials), "engine": engine, "eve_strategy": eve_strategy, "profile": bool(profile),
+              "seed": _seed_entropy(seed), "engine_version": ENGINE_VERSION}
+    if engine == "grid":
+        params["memory_budget"] = int(memory_budget)
+    seed_seq, saved = _resume(checkpoint, "sweep", params, seed)
+    workers = workers or os.cpu_count() or 1
+    cache = get_cache(cache) if seed is not None and not profile else None
+    done = {p: {} for p in eve_probs}
+    if saved and "cells" in saved:
+        by_key = {str(_point_key(p)): p for p in eve_probs}
+        for key, cells in saved["cells"].items():
+            done[by_key[key]].update({int(t): summary for t, summary in cells.items()})
+    resumed = sum(len(d) for d in done.values())
+    start = time.perf_counter()
+
+    def save_cells():
+        checkpoint.save("sweep", params, {
+            "entropy": seed_seq.entropy,
+            "cells": {str(_point_key(p)): {str(t): done[p][t] for t in sorted(done[p])} for p in eve_probs if done[p]}
+        })
+
+    # Progress aggregates, updated with each point's new trials only
+    running = {p: TrialAggregate(none_as_zero=True) for p in eve_probs}
+
+    def emit(p, trials):
+        for t in trials:
+            running[p].add(done[p][t])
+        if progress is not None:
+            progress.put(("point", _chunk_aggregate(p, [], running[p])))
+        if checkpoint is not None and checkpoint.due():
+            save_cells()
+
+    if engine == "stats":
+        cancelled, results = False, list(saved["results"]) if saved else []
+        resumed = sum(r["trials"] for r in results)
+        for p in eve_probs[len(results):]:
+            if cancel is not None and cancel.is_set():
+                cancelled = True
+                break
+            rng = np.random.default_rng(np.random.SeedSequence(seed_seq.entropy, spawn_key=(_point_key(p),)))
+            results.append(_chunk_aggregate(p, _sampled_chunks(n_qubits, p, test_fraction, trials, rng,
+                                                               eve_strategy)))
+            if progress is not None:
+                progress.put(("point", results[-1]))
+            if checkpoint is not None:
+                checkpoint.save("sweep", params, {"entropy": seed_seq.entropy, "results": results})
+        n_done = sum(r["trials"] for r in results)
+        n_computed = n_done - resumed
+        cache = None
+    elif engine == "grid":
+        cancelled, tiles = False, saved["tiles"] if saved else 0
+        aggs = {p: TrialAggregate(none_as_zero=True) for p in eve_probs}
+        rng = np.random.default_rng(seed_seq)
+        if saved:
+            rng.bit_generator.state = saved["rng"]
+            aggs.update({p: TrialAggregate.from_dict(saved["aggregates"][str(_point_key(p))]) for p in eve_probs})
+        resumed = sum(agg.trials for agg in aggs.values())
+
+        def save_tiles():
+            checkpoint.save("sweep", params, {
+                "entropy": seed_seq.entropy, "tiles": tiles, "rng": rng.bit_generator.state,
+                "aggregates": {str(_point_key(p)): aggs[p].to_dict() for p in eve_probs}
+            })
+
+        try:
+            for rows in iter_grid(eve_probs, n_qubits, trials, test_fraction, rng, memory_budget,
+                                  skip_tiles=tiles):
+                for p in dict.fromkeys(rows["eve_prob"].tolist()):
+                    aggs[p].add_chunk(rows[rows["eve_prob"] == p])
+                    if progress is not None:
+                        progress.put(("point", _chunk_aggregate(p, [], aggs[p])))
+                tiles += 1
+                if checkpoint is not None and checkpoint.due():
+                    save_tiles()
+                if cancel is not None and cancel.is_set():
+                    cancelled = True
+                    break
+        finally:
+            if checkpoint is not None:
+                save_tiles()
+        results = [_chunk_aggregate(p, [], aggs[p]) for p in eve_probs if aggs[p].trials]
+        n_done = sum(r["trials"] for r in results)
+        n_computed = n_done - resumed
+        cache = None
+    else:
+        cells = [(p, t) for p in eve_probs for t in range(trials) if t not in done[p]]
+        for p in eve_probs:
+            if done[p]:
+                emit(p, sorted(done[p]))
+        tasks = {cell: (n_qubits, cell[0], test_fraction, sweep_cell_seed(seed_seq, *cell), engine, profile,
+                        eve_strategy)
+                 for cell in cells}
+        try:
+            cancelled, n_computed = _run_cells(cells, tasks, done, workers, cache, cancel, emit)
+        finally:
+            if checkpoint is not None:
+                save_cells()
+        results = [_point_aggregate(p, [done[p][t] for t in sorted(done[p])]) for p in eve_probs if done[p]]
+        n_done = sum(len(d) for d in done.values())
+    wall_time = time.perf_counter() - start
+    ran = n_done - resumed
+    summary = {
+        "results": results,
+        "cancelled": cancelled,
+        "seed": seed_seq.entropy,
+        "cells": n_done,
+        "resumed_cells": resumed,
+        "cache_hits": ran - n_computed if cache is not None else 0,
+        "wall_time": wall_time,
+        "trials_per_sec": ran / wall_time if wall_time > 0 else None
+    }
+    if profile:
+        timer = StageTimer()
+        for p in eve_probs:
+            for t in sorted(done[p]):
+                timer.merge(done[p][t])
+        summary["metrics"] = _collect_metrics(
+            "run_sweep", timer,
+            {"trials": n_done, "wall_time": wall_time, "trials_per_sec": summary["trials_per_sec"]}, metrics_hook
+        )
+    if progress is not None:
+        progress.put(("done", summary))
+    return summary
+
+
+def _ci_width(errs: List[float]) -> float:
+    # Width of the 95% confidence interval of the mean error rate
+    if len(errs) < 2:
+        return float("inf")
+    return 2 * _Z95 * float(np.std(errs, ddof=1)) / np.sqrt(len(errs))
+
+
+def _trials_needed(errs: List[float], ci_width: float, min_trials: int, max_trials: int) -> int:
+    n = len(errs)
+    if n < min_trials:
+        return min_trials
+    width = _ci_width(errs)
+    if width <= ci_width:
+        return n
+    # CI width shrinks as 1/sqrt(n); grow at most 2x per round so the estimate of std can settle
+    needed = int(np.ceil(n * (width / ci_width) ** 2))
+    return min(max_trials, needed, 2 * n)
+
+
+def _refine_points(points: List[float], means: List[float], max_step: float, min_spacing: float,
+                   budget: int) -> List[float]:
+    # Midpoints of intervals that straddle the abort threshold or where the mean
+    # error changes by more than max_step; threshold crossings go first
+    candidates = []
+    for (a, ma), (b, mb) in zip(zip(points, means), zip(points[1:], means[1:])):
+        if b - a < 2 * min_spacing:
+            continue
+        crosses = (ma - ABORT_THRESHOLD) * (mb - ABORT_THRESHOLD) < 0
+        step = abs(mb - ma)
+        if crosses or step > max_step:
+            candidates.append((not crosses, -step, round((a + b) / 2, 6)))
+    return [p for _, _, p in sorted(candidates)[:max(budget, 0)]]
+
+
+def run_adaptive_sweep(n_qubits: int, test_fraction: float, eve_min: float = 0.0, eve_max: float = 1.0,
+                       initial_points: int = 5, ci_width: float = 0.02, min_trials: int = 8,
+                       max_trials: int = 256, max_step: float = 0.05, min_spacing: float = 1 / 64,
+                       max_points: int = 41, fixed_points: int = 21, workers: Optional[int] = None, seed=None,
+                       engine: str = "vectorized", progress: Optional[queue.Queue] = None,
+                       cancel: Optional[threading.Event] = None,
+                       cache: Union[bool, str, ResultCache, None] = None,
+                       eve_strategy: str = "intercept_random") -> Dict:
+    """Sweep the Eve probability, spending trials and points only where they are needed.
+
+    Each round first adds trials to every point whose 95% confidence interval of
+    the mean error rate is wider than ``ci_width`` (at least ``min_trials``, at
+    most ``max_trials`` per point). Once all points meet the target, midpoints are
+    added where the curve crosses ``ABORT_THRESHOLD`` or changes by more than
+    ``max_step``, down to ``min_spacing`` and up to ``max_points`` points.
+
+    Cells use the same seeds as ``run_sweep``, so the cache is shared and results
+    do not depend on ``workers``. ``fixed_grid_trials`` in the result is what a
+    ``fixed_points`` grid would cost at the trial count of the worst adaptive
+    point; ``progress``, ``cancel``, ``cache`` and ``eve_strategy`` behave as in
+    ``run_sweep``.
+    """
+    _check_strategy(engine, eve_strategy)
+    seed_seq = np.random.SeedSequence(seed)
+    workers = workers or os.cpu_count() or 1
+    cache = get_cache(cache) if seed is not None else None
+    done = {float(p): {} for p in np.round(np.linspace(eve_min, eve_max, initial_points), 6)}
+    start = time.perf_counter()
+    cancelled = False
+    n_computed = 0
+    rounds = 0
+
+    def errors(p):
+        return _sweep_errors([done[p][t] for t in sorted(done[p])])
+
+    running = {}
+
+    def emit(p, trials):
+        agg = running.setdefault(p, TrialAggregate(none_as_zero=True))
+        for t in trials:
+            agg.add(done[p][t])
+        if progress is not None:
+            progress.put(("point", _chunk_aggregate(p, [], agg)))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init) if workers > 1 else _NO_POOL as pool:
+        while not cancelled:
+            cells = []
+            for p in sorted(done):
+                n = len(done[p])
+                cells.extend((p, t) for t in range(n, _trials_needed(errors(p), ci_width, min_trials, max_trials)))
+            if not cells:
+                points = sorted(done)
+                new = _refine_points(points, [float(np.mean(errors(p))) for p in points], max_step, min_spacing,
+                                     max_points - len(points))
+                if not new:
+                    break
+                for p in new:
+                    done[p] = {}
+                continue
+            rounds += 1
+            tasks = {cell: (n_qubits, cell[0], test_fraction, sweep_cell_seed(seed_seq, *cell), engine, False,
+                            eve_strategy)
+                     for cell in cells}
+            cancelled, computed = _run_cells(cells, tasks, done, workers, cache, cancel, emit, pool)
+            n_computed += computed
+
+    results = []
+    for p in sorted(done):
+        if done[p]:
+            agg = _point_aggregate(p, [done[p][t] for t in sorted(done[p])])
+            agg["ci_width"] = _ci_width(errors(p))
+            results.append(agg)
+    wall_time = time.perf_counter() - start
+    n_done = sum(len(d) for d in done.values())
+    fixed = fixed_points * max((len(d) for d in done.values()), default=0)
+    summary = {
+        "results": results,
+        "cancelled": cancelled,
+        "seed": seed_seq.entropy,
+        "cells": n_done,
+        "points": len(results),
+        "rounds": rounds,
+        "fixed_grid_trials": fixed,
+        "trial_savings": 1 - n_done / fixed if fixed else None,
+        "cache_hits": n_done - n_computed if cache is not None else 0,
+        "wall_time": wall_time,
+        "trials_per_sec": n_done / wall_time if wall_time > 0 else None
     }
+    if progress is not None:
+        progress.put(("done", summary))
+    return summary
+
+
+class SweepService:
+    """Runs `run_sweep` on a background thread; consumers drain `queue` for progress."""
+
+    def __init__(self, eve_probs: Sequence[float], n_qubits: int, test_fraction: float, trials: int,
+                 workers: Optional[int] = None, seed=None, engine: str = "vectorized",
+                 cache: Union[bool, str, ResultCache, None] = None, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 eve_strategy: str = "intercept_random", checkpoint: Union[str, Checkpoint, None] = None):
+        self.queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self._kwargs = dict(eve_probs=eve_probs, n_qubits=n_qubits, test_fraction=test_fraction, trials=trials,
+                            workers=workers, seed=seed, engine=engine, cache=cache,
+                            memory_budget=memory_budget, eve_strategy=eve_strategy, checkpoint=checkpoint)
+        self._thread = None
+
+    def _target(self):
+        try:
+            run_sweep(progress=self.queue, cancel=self.cancel_event, **self._kwargs)
+        except Exception as e:
+            self.queue.put(("error", e))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._target, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,11 @@
+import pytest
+from analytic import validate
+from eve import STRATEGIES
+
+
+@pytest.mark.parametrize("strategy", sorted(STRATEGIES))
+def test_validate_each_strategy(strategy):
+    engine = "per_qubit" if strategy == "intercept_random" else "vectorized"
+    res = validate(n_qubits=400, eve_prob=0.5, trials=150, engine=engine, seed=7, eve_strategy=strategy)
+    assert res["eve_strategy"] == strategy
+    assert res["passed"], res["p_values"]
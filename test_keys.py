@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+from keys import BitKey
+
+
+@pytest.mark.parametrize("n", [0, 1, 13, 64])
+@pytest.mark.parametrize("s", [slice(None, None, -1), slice(None, None, 3), slice(None, None, -2), slice(10, 2, -1),
+                               slice(2, 10, 2), slice(-3, None, -3), slice(5, 5, -1), slice(3, 11), slice(11, 3)])
+def test_slice_matches_numpy(n, s):
+    bits = np.random.default_rng(n).integers(0, 2, n, dtype=np.uint8)
+    k = BitKey.from_bits(bits)
+    assert np.array_equal(k[s].to_bits(), np.asarray(k)[s])
+    assert len(k[s]) == len(bits[s])
+
+
+@pytest.mark.parametrize("indices", [[], [0], [12, 0, 5, 5], np.array([], dtype=np.int64), range(0, 13, 4)])
+def test_take_matches_numpy(indices):
+    bits = np.random.default_rng(1).integers(0, 2, 13, dtype=np.uint8)
+    k = BitKey.from_bits(bits)
+    assert np.array_equal(k.take(indices).to_bits(), bits[np.asarray(indices, dtype=np.intp)])
+    assert len(k.take(indices)) == len(np.asarray(indices))
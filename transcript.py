@@ -0,0 +1,228 @@
+"""Per-qubit transcripts of a BB84 run stored as one ``.npy`` column per field.
+
+    with TranscriptWriter("run1") as w:
+        for data in simulate_bb84_stream(10**7, events="block"):
+            w.write(data)
+    t = Transcript("run1")          # columns open as read-only memory maps
+    t["bob_bit"][t.sifted()]
+    t.to_csv("run1.csv")            # chunked conversion
+
+Columns are appended as the simulation yields block events, so memory stays at
+one block; ``finish`` adds the test-set membership column and a ``meta.json``
+with the run statistics.
+"""
+import json
+import os
+import struct
+import numpy as np
+from typing import Dict, Iterator, List, Optional
+
+# Compact on-disk dtype of every column; bases are 0 = Z, 1 = X
+COLUMNS = {
+    "index": np.int64,
+    "alice_bit": np.uint8,
+    "alice_basis": np.uint8,
+    "bob_basis": np.uint8,
+    "bob_bit": np.uint8,
+    "eve_intercepted": np.bool_,
+    "in_test": np.bool_,
+}
+EVENT_COLUMNS = [name for name in COLUMNS if name != "in_test"]
+CHUNK_ROWS = 1 << 20
+# Fixed .npy header size, so the final length can be written in place at the end
+_HEADER_BYTES = 128
+
+
+def _write_header(f, dtype, length: int) -> None:
+    header = repr({"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)), "fortran_order": False,
+                   "shape": (length,)})
+    prefix = np.lib.format.magic(1, 0)
+    body = header.ljust(_HEADER_BYTES - len(prefix) - 3) + "\n"
+    f.write(prefix + struct.pack("<H", len(body)) + body.encode("latin1"))
+
+
+class _Column:
+    # Append-only .npy file whose header is rewritten with the final length on close
+    def __init__(self, path: str, dtype):
+        self.dtype = np.dtype(dtype)
+        self.length = 0
+        self._f = open(path, "wb")
+        _write_header(self._f, self.dtype, 0)
+
+    def append(self, values) -> None:
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        self._f.write(values.data)
+        self.length += len(values)
+
+    def close(self) -> None:
+        self._f.seek(0)
+        _write_header(self._f, self.dtype, self.length)
+        self._f.close()
+
+
+def _basis_codes(labels) -> np.ndarray:
+    labels = np.asarray(labels)
+    return labels.astype(np.uint8) if labels.dtype.kind in "biu" else (labels == "X").astype(np.uint8)
+
+
+def _jsonable(stats: Dict) -> Dict:
+    out = {}
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            out[key] = _jsonable(value)
+        elif isinstance(value, (np.generic,)):
+            out[key] = value.item()
+        elif value is None or isinstance(value, (bool, int, float, str, list)):
+            out[key] = value
+    return out
+
+
+class TranscriptWriter:
+    """Streams the events of ``simulate_bb84_stream`` into a transcript directory.
+
+    Pass every item the stream yields to ``write``: block events (``events="block"``)
+    are appended directly, per-qubit dicts are buffered, and the final summary
+    triggers ``finish``. ``meta`` is stored alongside the run statistics.
+    """
+
+    def __init__(self, directory: str, meta: Optional[Dict] = None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.meta = dict(meta or {})
+        self._columns = {name: _Column(os.path.join(directory, f"{name}.npy"), COLUMNS[name])
+                         for name in EVENT_COLUMNS}
+        self._pending: List[Dict] = []
+        self.closed = False
+
+    def __enter__(self) -> "TranscriptWriter":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.close()
+        return False
+
+    def __len__(self) -> int:
+        return self._columns["index"].length + len(self._pending)
+
+    def write(self, data) -> None:
+        if isinstance(data, np.ndarray):
+            self._flush()
+            self.write_block(data)
+        elif data.get("final", False):
+            self.finish(data)
+        else:
+            self._pending.append(data)
+            if len(self._pending) >= CHUNK_ROWS:
+                self._flush()
+
+    def write_block(self, block: np.ndarray) -> None:
+        for name, column in self._columns.items():
+            values = block[name]
+            column.append(_basis_codes(values) if name.endswith("_basis") else values)
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        rows = self._pending
+        self._pending = []
+        for name, column in self._columns.items():
+            values = [row[name] for row in rows]
+            column.append(_basis_codes(values) if name.endswith("_basis") else values)
+
+    def finish(self, final: Dict) -> None:
+        """Write the in_test column from ``final["test_indices"]`` and the metadata."""
+        self._flush()
+        for column in self._columns.values():
+            column.close()
+        n = self._columns["index"].length
+        alice = np.load(os.path.join(self.directory, "alice_basis.npy"), mmap_mode="r") if n else np.zeros(0)
+        bob = np.load(os.path.join(self.directory, "bob_basis.npy"), mmap_mode="r") if n else np.zeros(0)
+        test_indices = np.sort(np.asarray(final.get("test_indices", []), dtype=np.int64))
+
+        in_test = _Column(os.path.join(self.directory, "in_test.npy"), np.bool_)
+        sifted_before = 0
+        for start in range(0, n, CHUNK_ROWS):
+            same = np.flatnonzero(alice[start:start + CHUNK_ROWS] == bob[start:start + CHUNK_ROWS])
+            # Test indices count sifted bits; map the ones falling in this chunk back to rows
+            lo, hi = np.searchsorted(test_indices, [sifted_before, sifted_before + len(same)])
+            mask = np.zeros(min(CHUNK_ROWS, n - start), dtype=bool)
+            mask[same[test_indices[lo:hi] - sifted_before]] = True
+            in_test.append(mask)
+            sifted_before += len(same)
+        in_test.close()
+
+        meta = {**self.meta, "rows": n, "columns": list(COLUMNS), "stats": _jsonable(final.get("stats", {}))}
+        with open(os.path.join(self.directory, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        self.closed = True
+
+    def close(self) -> None:
+        """Close the column files; a transcript without ``finish`` has no in_test column."""
+        if not self.closed:
+            self._flush()
+            for column in self._columns.values():
+                if not column._f.closed:
+                    column.close()
+            self.closed = True
+
+
+class Transcript:
+    """Read-only view of a transcript directory; columns are memory-mapped, not loaded."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        meta_path = os.path.join(directory, "meta.json")
+        self.meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.meta = json.load(f)
+        self._cache = {}
+
+    @property
+    def columns(self) -> List[str]:
+        return [name for name in COLUMNS if os.path.exists(os.path.join(self.directory, f"{name}.npy"))]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self._cache:
+            path = os.path.join(self.directory, f"{name}.npy")
+            try:
+                self._cache[name] = np.load(path, mmap_mode="r")
+            except ValueError:
+                # np.memmap cannot map an empty column
+                self._cache[name] = np.load(path)
+        return self._cache[name]
+
+    def __len__(self) -> int:
+        return len(self["index"])
+
+    @property
+    def stats(self) -> Dict:
+        return self.meta.get("stats", {})
+
+    def sifted(self) -> np.ndarray:
+        return self["alice_basis"] == self["bob_basis"]
+
+    def iter_chunks(self, columns: Optional[List[str]] = None, chunk_rows: int = CHUNK_ROWS) -> Iterator[Dict]:
+        columns = columns or self.columns
+        for start in range(0, len(self), chunk_rows):
+            yield {name: self[name][start:start + chunk_rows] for name in columns}
+
+    def to_csv(self, path: str, columns: Optional[List[str]] = None, chunk_rows: int = CHUNK_ROWS,
+               sifted_only: bool = False) -> int:
+        """Write the transcript as CSV one chunk at a time; returns the number of rows written."""
+        import pandas as pd
+
+        columns = columns or self.columns
+        needed = list(dict.fromkeys(columns + (["alice_basis", "bob_basis"] if sifted_only else [])))
+        rows = 0
+        for chunk in self.iter_chunks(needed, chunk_rows):
+            # Booleans as 0/1 like the other bit columns
+            df = pd.DataFrame({name: chunk[name].view(np.uint8) if chunk[name].dtype == np.bool_ else chunk[name]
+                               for name in columns}, copy=False)
+            if sifted_only:
+                df = df[chunk["alice_basis"] == chunk["bob_basis"]]
+            df.to_csv(path, index=False, mode="w" if rows == 0 else "a", header=rows == 0)
+            rows += len(df)
+        if rows == 0:
+            pd.DataFrame(columns=columns).to_csv(path, index=False)
+        return rows